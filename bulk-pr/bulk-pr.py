@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Show the state, checks, diffs or open PRs for a branch across all operator repositories.
+
+The state and check rollups of the PRs in all repositories from the `repos`
+script are fetched with a single batched GraphQL query (`gh api graphql`).
+Diffs are not available via GraphQL and are fetched with `gh pr diff` on a
+bounded pool of workers.
+
+Usage:
+
+    ./bulk-pr.py status template_abd68ad
+    ./bulk-pr.py checks template_abd68ad --json
+    ./bulk-pr.py diffs template_abd68ad | less
+    ./bulk-pr.py list
+
+Set GH (or pass --gh) to use another `gh` executable, e.g. a stub for testing.
+"""
+
+import argparse
+import concurrent.futures
+import json
+import os
+import pathlib
+import re
+import subprocess
+import sys
+
+OWNER = "stackabletech"
+REPOS_FILE = pathlib.Path(__file__).parent / "repos"
+# Number of repositories per GraphQL query.
+BATCH_SIZE = 20
+MAX_WORKERS = 8
+
+# Number of PRs fetched per branch to find an open one among closed or merged PRs.
+BRANCH_PR_COUNT = 5
+
+CHECK_FIELDS = """
+        commits(last: 1) {
+          nodes {
+            commit {
+              statusCheckRollup {
+                state
+                contexts(first: 100) {
+                  nodes {
+                    __typename
+                    ... on CheckRun { name status conclusion detailsUrl }
+                    ... on StatusContext { context state targetUrl }
+                  }
+                }
+              }
+            }
+          }
+        }"""
+
+BRANCH_PRS = f"""
+    pullRequests(headRefName: $branch, first: {BRANCH_PR_COUNT}, orderBy: {{field: CREATED_AT, direction: DESC}}) {{
+      nodes {{
+        number url state title isDraft reviewDecision
+        additions deletions changedFiles{CHECK_FIELDS}
+      }}
+    }}"""
+
+OPEN_PRS = """
+    pullRequests(states: OPEN, first: 100, orderBy: {field: CREATED_AT, direction: DESC}) {
+      nodes { number url title headRefName isDraft author { login } }
+    }"""
+
+
+class BulkPrException(Exception):
+    pass
+
+
+def load_repos(repos_file: pathlib.Path) -> list[str]:
+    """Return the repository names from the `products` array of the bash repos script."""
+    match = re.search(r"products=\(([^)]*)\)", repos_file.read_text())
+    if not match:
+        raise BulkPrException(f"No products array found in {repos_file}")
+    return [f"{product}-operator" for product in match.group(1).split()]
+
+
+def gh(args: argparse.Namespace, *gh_args: str) -> str:
+    try:
+        return subprocess.run(
+            [args.gh, *gh_args], check=True, capture_output=True, text=True
+        ).stdout
+    except subprocess.CalledProcessError as e:
+        raise BulkPrException(f"{args.gh} {gh_args[0]} failed: {e.stderr.strip()}")
+
+
+def graphql(args: argparse.Namespace, repos: list[str], fields: str) -> dict:
+    """Query `fields` for all repos with one request and return the result by repo name."""
+    selections = "\n".join(
+        f'  r{i}: repository(owner: "{OWNER}", name: "{repo}") {{{fields}\n  }}'
+        for i, repo in enumerate(repos)
+    )
+    variables = "($branch: String!)" if "$branch" in fields else ""
+    query = f"query{variables} {{\n{selections}\n}}"
+
+    gh_args = ["api", "graphql", "-f", f"query={query}"]
+    if variables:
+        gh_args += ["-f", f"branch={args.branch}"]
+    # gh exits with 1 if part of the query failed (e.g. a repository does not exist)
+    # but still prints the data of the other repositories.
+    proc = subprocess.run(
+        [args.gh, *gh_args], check=False, capture_output=True, text=True
+    )
+    try:
+        data = json.loads(proc.stdout)["data"]
+    except (json.JSONDecodeError, KeyError, TypeError):
+        raise BulkPrException(f"{args.gh} api graphql failed: {proc.stderr.strip()}")
+    return {repo: data.get(f"r{i}") for i, repo in enumerate(repos)}
+
+
+def fetch(args: argparse.Namespace, pool, fields: str) -> dict:
+    """Run the batched queries for all repos on the pool. Missing repositories map to None."""
+    batches = [
+        args.repos[i : i + BATCH_SIZE] for i in range(0, len(args.repos), BATCH_SIZE)
+    ]
+    result = {}
+    for batch in pool.map(lambda b: graphql(args, b, fields), batches):
+        result.update(batch)
+    return result
+
+
+def branch_prs(args: argparse.Namespace, pool) -> list[dict]:
+    """Return one entry per repo with the PR for the branch or None.
+
+    Like `gh pr view <branch>`, an open PR is preferred over more recent closed or merged ones.
+    """
+    prs = []
+    for repo, data in fetch(args, pool, BRANCH_PRS).items():
+        nodes = data["pullRequests"]["nodes"] if data else []
+        pr = next(
+            (n for n in nodes if n["state"] == "OPEN"), nodes[0] if nodes else None
+        )
+        prs.append({"repo": repo, "pr": summarize_pr(pr) if pr else None})
+    return prs
+
+
+def summarize_pr(pr: dict) -> dict:
+    commits = pr.pop("commits")["nodes"]
+    rollup = commits[0]["commit"]["statusCheckRollup"] if commits else None
+    checks = []
+    for ctx in rollup["contexts"]["nodes"] if rollup else []:
+        if ctx["__typename"] == "CheckRun":
+            state = ctx["conclusion"] or ctx["status"]
+            checks.append(
+                {"name": ctx["name"], "state": state, "url": ctx["detailsUrl"]}
+            )
+        else:
+            checks.append(
+                {"name": ctx["context"], "state": ctx["state"], "url": ctx["targetUrl"]}
+            )
+    return {**pr, "checks_state": rollup and rollup["state"], "checks": checks}
+
+
+def cmd_status(args: argparse.Namespace, pool) -> int:
+    prs = branch_prs(args, pool)
+    if args.json:
+        print(json.dumps(prs, indent=2))
+    else:
+        rows = [("REPO", "PR", "STATE", "CHECKS", "REVIEW", "URL")]
+        for entry in prs:
+            pr = entry["pr"]
+            if pr is None:
+                rows.append((entry["repo"], "-", "NO PR", "-", "-", "-"))
+                continue
+            rows.append(
+                (
+                    entry["repo"],
+                    f"#{pr['number']}",
+                    "DRAFT" if pr["isDraft"] else pr["state"],
+                    pr["checks_state"] or "-",
+                    pr["reviewDecision"] or "-",
+                    pr["url"],
+                )
+            )
+        print_table(rows)
+    # Same meaning as the pr_status script: 0 if all checks were successful.
+    return (
+        0 if all(e["pr"] and e["pr"]["checks_state"] == "SUCCESS" for e in prs) else 1
+    )
+
+
+def cmd_checks(args: argparse.Namespace, pool) -> int:
+    prs = branch_prs(args, pool)
+    if args.json:
+        print(json.dumps(prs, indent=2))
+        return 0
+    rows = [("REPO", "CHECK", "STATE", "URL")]
+    for entry in prs:
+        for check in entry["pr"]["checks"] if entry["pr"] else []:
+            rows.append((entry["repo"], check["name"], check["state"], check["url"]))
+    print_table(rows)
+    return 0
+
+
+def cmd_diffs(args: argparse.Namespace, pool) -> int:
+    def diff(repo: str) -> str:
+        try:
+            return gh(args, "pr", "diff", args.branch, "-R", f"{OWNER}/{repo}")
+        except BulkPrException as e:
+            return f"# {e}\n"
+
+    diffs = dict(zip(args.repos, pool.map(diff, args.repos)))
+    if args.json:
+        print(json.dumps(diffs, indent=2))
+    else:
+        for repo, text in diffs.items():
+            print(f"#### Diff for {repo} ###")
+            print(text, end="")
+    return 0
+
+
+def cmd_list(args: argparse.Namespace, pool) -> int:
+    prs = {
+        repo: data["pullRequests"]["nodes"] if data else []
+        for repo, data in fetch(args, pool, OPEN_PRS).items()
+    }
+    if args.json:
+        print(json.dumps(prs, indent=2))
+        return 0
+    rows = [("REPO", "PR", "BRANCH", "AUTHOR", "TITLE")]
+    for repo, nodes in prs.items():
+        for pr in nodes:
+            rows.append(
+                (
+                    repo,
+                    f"#{pr['number']}",
+                    pr["headRefName"],
+                    (pr["author"] or {}).get("login", "-"),
+                    pr["title"],
+                )
+            )
+    print_table(rows)
+    return 0
+
+
+def print_table(rows: list[tuple]) -> None:
+    widths = [max(len(str(row[i])) for row in rows) for i in range(len(rows[0]))]
+    for row in rows:
+        print("  ".join(str(v).ljust(w) for v, w in zip(row, widths)).rstrip())
+
+
+COMMANDS = {
+    "status": cmd_status,
+    "checks": cmd_checks,
+    "diffs": cmd_diffs,
+    "list": cmd_list,
+}
+
+
+def cli_positive_int(cli_arg: str) -> int:
+    try:
+        value = int(cli_arg)
+    except ValueError:
+        value = 0
+    if value < 1:
+        raise argparse.ArgumentTypeError("Expected a positive integer")
+    return value
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Bulk PR operations across the operator repositories.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument("command", choices=COMMANDS.keys())
+    parser.add_argument(
+        "branch",
+        nargs="?",
+        help="Name of the PR branch to operate on. Not used by 'list'.",
+    )
+    parser.add_argument(
+        "--json", help="Print JSON instead of a table.", action="store_true"
+    )
+    parser.add_argument(
+        "--repos-file",
+        help=f"Bash script defining the products array. Default: {REPOS_FILE}",
+        type=pathlib.Path,
+        default=REPOS_FILE,
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        help=f"Maximum number of concurrent gh calls. Default: {MAX_WORKERS}",
+        type=cli_positive_int,
+        default=MAX_WORKERS,
+    )
+    parser.add_argument(
+        "--gh",
+        help="The gh executable. Default: $GH or 'gh'",
+        default=os.environ.get("GH", "gh"),
+    )
+    args = parser.parse_args(argv)
+    if args.command != "list" and not args.branch:
+        parser.error(f"'{args.command}' requires the name of the PR branch")
+    return args
+
+
+def main(argv) -> int:
+    args = parse_args(argv[1:])
+    try:
+        args.repos = load_repos(args.repos_file)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=args.jobs) as pool:
+            return COMMANDS[args.command](args, pool)
+    except BulkPrException as e:
+        print(e, file=sys.stderr)
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,307 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#   "pyyaml",
+# ]
+# ///
+"""
+Benchmark the stages of build-manifests.py against a fake helm and a fake quay.io.
+
+Every stage runs in a fresh interpreter so that the peak RSS can be attributed
+to it. For each stage the wall time (best of all rounds), the peak RSS and the
+number of bytes written are recorded. The setup of a stage (e.g. rendering the
+chart before writing it) is not part of the wall time but is part of the RSS.
+
+Usage:
+
+    # Record a baseline
+    ./olm/benchmarks/bench_build_manifests.py --crds 20 --save-baseline /tmp/olm-bench.json
+
+    # Compare against it after a change. Exits with 1 on regressions.
+    ./olm/benchmarks/bench_build_manifests.py --crds 20 --baseline /tmp/olm-bench.json
+"""
+
+import argparse
+import hashlib
+import http.server
+import json
+import os
+import pathlib
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from yaml_backends import load_build_manifests
+
+BENCH_DIR = pathlib.Path(__file__).parent
+OPERATOR = "airflow-operator"
+RELEASE = "26.3.0"
+
+
+class FakeQuayHandler(http.server.BaseHTTPRequestHandler):
+    """Answers HEAD /v2/stackable/<image>/manifests/<tag> like quay.io."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_HEAD(self):
+        repository, sep, tag = self.path.removeprefix("/v2/").partition("/manifests/")
+        if not sep:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        digest = hashlib.sha256(f"{repository}:{tag}".encode()).hexdigest()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/vnd.oci.image.index.v1+json")
+        self.send_header("Docker-Content-Digest", f"sha256:{digest}")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def prepare_workdir(workdir: pathlib.Path) -> None:
+    """Create the operator and certification repositories and a bin dir with the fake helm."""
+    chart_dir = workdir / OPERATOR / "deploy" / "helm" / OPERATOR
+    chart_dir.mkdir(parents=True)
+    (chart_dir / "Chart.yaml").write_text(f"name: {OPERATOR}\n")
+    (chart_dir / "values.yaml").write_text("image: {}\n")
+    (
+        workdir
+        / "openshift-certified-operators"
+        / "operators"
+        / "stackable-airflow-operator"
+    ).mkdir(parents=True)
+    (workdir / "bin").mkdir()
+    (workdir / "bin" / "helm").symlink_to((BENCH_DIR / "fake_helm.py").resolve())
+
+
+def build_manifests_argv(workdir: pathlib.Path, quay_url: str) -> list[str]:
+    return [
+        "build-manifests.py",
+        "--release",
+        RELEASE,
+        "--repo-operator",
+        str(workdir / OPERATOR),
+        "--openshift-versions",
+        "v4.18-v4.21",
+        "--quay-url",
+        quay_url,
+        "--digest-cache",
+        str(workdir / "digests.sqlite"),
+        "--refresh",
+        "--no-render-cache",
+        "--log-level",
+        "error",
+    ]
+
+
+def stage_generate_helm_templates(bm, args, argv):
+    return lambda: sum(1 for _ in bm.generate_helm_templates(args))
+
+
+def stage_generate_manifests(bm, args, argv):
+    return lambda: sum(1 for _ in bm.generate_manifests(args))
+
+
+def stage_generate_csv(bm, args, argv):
+    manifests = bm.ManifestSet(bm.generate_helm_templates(args))
+    role, sa, deployment = bm.filter_op_objects(args, manifests)
+    related = [{"name": OPERATOR, "image": "quay.io/stackable/x@sha256:0"}]
+
+    def run():
+        for _ in range(100):
+            bm.generate_csv(
+                args, [(sa["metadata"]["name"], role)], [deployment], related
+            )
+
+    return run
+
+
+def stage_write_manifests(bm, args, argv):
+    manifests = list(bm.generate_manifests(args))
+
+    def run():
+        writer = bm.BundleWriter(args.dest_dir)
+        try:
+            bm.write_manifests(args, manifests, writer)
+            bm.write_metadata(args, writer)
+            writer.commit()
+        finally:
+            writer.cleanup()
+
+    return run
+
+
+def stage_main(bm, args, argv):
+    return lambda: bm.main(argv)
+
+
+STAGES = {
+    "generate_helm_templates": stage_generate_helm_templates,
+    "generate_manifests": stage_generate_manifests,
+    "generate_csv": stage_generate_csv,
+    "write_manifests": stage_write_manifests,
+    "main": stage_main,
+}
+
+
+def written_bytes() -> int | None:
+    """Bytes passed to write syscalls by this process (Linux only)."""
+    try:
+        for line in pathlib.Path("/proc/self/io").read_text().splitlines():
+            if line.startswith("wchar:"):
+                return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def run_stage(stage: str, workdir: pathlib.Path, quay_url: str) -> dict:
+    """Run a single stage in this process and return its measurements."""
+    bm = load_build_manifests()
+    bm.configure_logging(bm.logging.ERROR)
+    argv = build_manifests_argv(workdir, quay_url)
+    args = bm.BundleConfig.from_args(bm.parse_args(argv[1:]), workdir / OPERATOR)
+    # Every round writes the complete bundle.
+    shutil.rmtree(args.dest_dir, ignore_errors=True)
+    run = STAGES[stage](bm, args, argv)
+
+    bytes_before = written_bytes()
+    start = time.perf_counter()
+    run()
+    wall = time.perf_counter() - start
+    bytes_after = written_bytes()
+
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere.
+    if sys.platform != "darwin":
+        maxrss *= 1024
+    return {
+        "wall": wall,
+        "rss": maxrss,
+        "bytes": None if bytes_before is None else bytes_after - bytes_before,
+    }
+
+
+def run_benchmarks(opts: argparse.Namespace) -> dict:
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), FakeQuayHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    quay_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = pathlib.Path(tmp)
+        prepare_workdir(workdir)
+        env = {
+            **os.environ,
+            "PATH": f"{workdir / 'bin'}{os.pathsep}{os.environ['PATH']}",
+            "PYTHONPATH": str(BENCH_DIR),
+            "FAKE_HELM_CRDS": str(opts.crds),
+            "FAKE_HELM_PROPERTIES": str(opts.properties),
+        }
+        for stage in opts.stages:
+            rounds = []
+            for _ in range(opts.rounds):
+                proc = subprocess.run(
+                    [
+                        sys.executable,
+                        __file__,
+                        "--run-stage",
+                        stage,
+                        str(workdir),
+                        quay_url,
+                    ],
+                    env=env,
+                    capture_output=True,
+                    check=True,
+                )
+                rounds.append(json.loads(proc.stdout.splitlines()[-1]))
+            results[stage] = {
+                "wall": min(r["wall"] for r in rounds),
+                "rss": max(r["rss"] for r in rounds),
+                "bytes": rounds[0]["bytes"],
+            }
+    server.shutdown()
+    return results
+
+
+def report(results: dict, baseline: dict | None, tolerance: float) -> list[str]:
+    """Print the results and return the list of regressions against the baseline."""
+    regressions = []
+    print(f"{'stage':<24} {'wall':>9} {'peak rss':>10} {'written':>10}  baseline")
+    for stage, r in results.items():
+        written = "-" if r["bytes"] is None else f"{r['bytes'] / 1e6:.2f}MB"
+        line = f"{stage:<24} {r['wall']:8.3f}s {r['rss'] / 1e6:8.1f}MB {written:>10}"
+        base = (baseline or {}).get(stage)
+        if base:
+            deltas = []
+            for metric in ("wall", "rss"):
+                change = r[metric] / base[metric] - 1
+                deltas.append(f"{metric} {change:+.0%}")
+                if change > tolerance:
+                    regressions.append(f"{stage}: {metric} {change:+.0%}")
+            line += "  " + ", ".join(deltas)
+        print(line)
+    return regressions
+
+
+def main(argv) -> int:
+    if argv[1:2] == ["--run-stage"]:
+        stage, workdir, quay_url = argv[2:5]
+        print(json.dumps(run_stage(stage, pathlib.Path(workdir), quay_url)))
+        return 0
+
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[1],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument(
+        "--crds", type=int, default=10, help="Number of CRDs in the chart."
+    )
+    parser.add_argument(
+        "--properties", type=int, default=20, help="Properties per CRD schema level."
+    )
+    parser.add_argument("--rounds", type=int, default=3, help="Runs per stage.")
+    parser.add_argument(
+        "--stages",
+        nargs="+",
+        choices=STAGES.keys(),
+        default=list(STAGES.keys()),
+        help="Stages to benchmark. Default: all",
+    )
+    parser.add_argument(
+        "--baseline", type=pathlib.Path, help="Compare against this baseline."
+    )
+    parser.add_argument(
+        "--save-baseline", type=pathlib.Path, help="Store the results as baseline."
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Relative increase of wall time or RSS reported as regression. Default: 0.25",
+    )
+    opts = parser.parse_args(argv[1:])
+
+    baseline = json.loads(opts.baseline.read_text()) if opts.baseline else None
+    results = run_benchmarks(opts)
+    regressions = report(results, baseline, opts.tolerance)
+
+    if opts.save_baseline:
+        opts.save_baseline.write_text(json.dumps(results, indent=2) + "\n")
+    if regressions:
+        print("\nRegressions:\n  " + "\n  ".join(regressions))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Measure the start-up time of build-manifests.py for the different ways to run it.
+
+Every run starts a new process and the wall time until it exits is recorded.
+The launchers take turns. Compared are:
+
+- uv run --script: the shebang of the script (only if uv is installed)
+- python3 script: the script run directly, compiled on every start
+- entry point: the console entry point of pyproject.toml, run in place
+- installed entry point: the `build-manifests` command on the PATH, if any
+
+Usage:
+
+    ./olm/benchmarks/cold_start.py --rounds 20
+
+    # Compare against an older version of the script
+    git show HEAD~1:olm/build-manifests.py > /tmp/build-manifests-old.py
+    ./olm/benchmarks/cold_start.py --script /tmp/build-manifests-old.py
+"""
+
+import argparse
+import pathlib
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+OLM_DIR = pathlib.Path(__file__).parent.parent.resolve()
+ENTRY_POINT = (
+    "import sys; sys.path.insert(0, {olm_dir!r}); import stackable_olm; "
+    "sys.argv[0] = 'build-manifests'; sys.exit(stackable_olm.build_manifests())"
+)
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Measure the start-up time of build-manifests.py.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument(
+        "--rounds", help="Runs per launcher. Default: 10", type=int, default=10
+    )
+    parser.add_argument(
+        "--script",
+        help="Also measure this copy of build-manifests.py, e.g. an older version.",
+        type=pathlib.Path,
+    )
+    parser.add_argument(
+        "--uv",
+        help="The uv executable. Default: uv from the PATH",
+        default=shutil.which("uv"),
+    )
+    parser.add_argument(
+        "script_args",
+        help="Arguments passed to build-manifests. Default: --version",
+        nargs="*",
+        default=["--version"],
+    )
+    return parser.parse_args(argv)
+
+
+def launchers(opts: argparse.Namespace) -> dict[str, list[str]]:
+    script = OLM_DIR / "build-manifests.py"
+    result = {}
+    if opts.uv:
+        result["uv run --script"] = [opts.uv, "run", "--script", str(script)]
+    if opts.script:
+        result[f"python3 {opts.script.name}"] = [sys.executable, str(opts.script)]
+    result["python3 script"] = [sys.executable, str(script)]
+    result["entry point"] = [
+        sys.executable,
+        "-c",
+        ENTRY_POINT.format(olm_dir=str(OLM_DIR)),
+    ]
+    if installed := shutil.which("build-manifests"):
+        result["installed entry point"] = [installed]
+    return result
+
+
+def run(cmd: list[str]) -> float:
+    start = time.perf_counter()
+    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def measure(cmds: dict[str, list[str]], rounds: int) -> dict[str, list[float]]:
+    """Run the commands in turns, so that changes of the system load affect all of them alike."""
+    # The first run prepares the uv environment and the bytecode cache.
+    for cmd in cmds.values():
+        run(cmd)
+    times = {name: [] for name in cmds}
+    for _ in range(rounds):
+        for name, cmd in cmds.items():
+            times[name].append(run(cmd))
+    return times
+
+
+def main(argv) -> int:
+    opts = parse_args(argv[1:])
+    if not opts.uv:
+        print("uv not found, skipping 'uv run --script'", file=sys.stderr)
+
+    results = measure(
+        {name: [*cmd, *opts.script_args] for name, cmd in launchers(opts).items()},
+        opts.rounds,
+    )
+
+    reference = statistics.median(next(iter(results.values())))
+    print(f"{'launcher':<28} {'min':>8} {'median':>8} {'speedup':>8}")
+    for name, times in results.items():
+        median = statistics.median(times)
+        print(
+            f"{name:<28} {min(times) * 1000:6.1f}ms {median * 1000:6.1f}ms {reference / median:7.2f}x"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,112 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#   "pyyaml",
+# ]
+# ///
+"""
+Measure the memory saved by --compact-manifests of build-manifests.py.
+
+Loads the CRDs of several operators, keeps all of them in memory like a process
+building many bundles would, and compares the allocated memory with and without
+the compact representation. Also checks that the YAML output is identical.
+
+Pass the CRD files of real operator charts, e.g.:
+
+    ./olm/benchmarks/compact_manifests.py \
+      ~/repo/stackable/hdfs-operator/deploy/helm/hdfs-operator/crds/crds.yaml \
+      ~/repo/stackable/druid-operator/deploy/helm/druid-operator/crds/crds.yaml \
+      ~/repo/stackable/spark-k8s-operator/deploy/helm/spark-k8s-operator/crds/crds.yaml
+
+Without arguments synthetic CRDs are used. Their top-level properties have
+unique descriptions while the nested schemas repeat, like the Kubernetes types
+(e.g. the pod template) embedded in every role of the real CRDs.
+
+The memory is measured with the compaction table still alive, as it is when
+bundles are built with --compact-manifests.
+"""
+
+import argparse
+import gc
+import pathlib
+import sys
+import time
+import tracemalloc
+
+import yaml
+
+from yaml_backends import load_build_manifests, synthetic_crd
+
+
+def synthetic_crds(count: int, properties: int) -> list[str]:
+    crds = []
+    for i in range(count):
+        crd = synthetic_crd(i, properties)
+        schema = crd["spec"]["versions"][0]["schema"]["openAPIV3Schema"]
+        for name, prop in schema["properties"].items():
+            prop["description"] = (
+                f"{prop['description']} ({crd['metadata']['name']} {name})"
+            )
+        crds.append(yaml.dump(crd))
+    return crds
+
+
+def measure(bm, texts: list[str], compact: bool) -> tuple[int, float, list[dict]]:
+    """Return the memory retained by the loaded documents, the load time and the documents."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    compactor = bm.ManifestCompactor()
+    documents = []
+    for text in texts:
+        for doc in yaml.load_all(text, Loader=bm.YamlLoader):
+            if doc:
+                documents.append(compactor.compact(doc) if compact else doc)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return retained, elapsed, documents
+
+
+def main(argv) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[1],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument("crd_files", nargs="*", type=pathlib.Path)
+    parser.add_argument(
+        "--crds", type=int, default=30, help="Number of synthetic CRDs."
+    )
+    parser.add_argument(
+        "--properties", type=int, default=20, help="Properties per schema level."
+    )
+    args = parser.parse_args(argv[1:])
+
+    bm = load_build_manifests()
+    if args.crd_files:
+        texts = [f.read_text() for f in args.crd_files]
+    else:
+        texts = synthetic_crds(args.crds, args.properties)
+    print(f"{sum(len(t) for t in texts) / 1e6:.1f} MB of YAML")
+
+    plain, plain_time, plain_docs = measure(bm, texts, compact=False)
+    plain_yaml = [bm.dump_yaml(d) for d in plain_docs]
+    del plain_docs
+    compact, compact_time, compact_docs = measure(bm, texts, compact=True)
+
+    if [bm.dump_yaml(d) for d in compact_docs] != plain_yaml:
+        print("YAML output of the compact representation differs!")
+        return 1
+
+    print(f"{'':8} {'memory':>10} {'load':>8}")
+    print(f"{'plain':8} {plain / 1e6:8.1f}MB {plain_time:7.2f}s")
+    print(f"{'compact':8} {compact / 1e6:8.1f}MB {compact_time:7.2f}s")
+    print(f"Memory reduced by {1 - compact / plain:.0%}. Output is identical.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
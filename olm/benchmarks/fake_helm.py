@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Stand-in for the helm binary used by the benchmarks.
+
+`helm template <release> ...` prints a synthetic operator chart with the
+objects build-manifests.py expects plus a configurable number of CRDs:
+
+    FAKE_HELM_CRDS        number of CRDs (default: 10)
+    FAKE_HELM_PROPERTIES  properties per schema level of each CRD (default: 20)
+
+`helm version` prints a fixed version.
+"""
+
+import os
+import sys
+
+import yaml
+
+from yaml_backends import synthetic_crd
+
+
+def with_labels(obj: dict, labels: dict) -> dict:
+    obj["metadata"]["labels"] = labels
+    return obj
+
+
+def chart(release: str, crds: int, properties: int) -> list[dict]:
+    product = release.rsplit("-", maxsplit=1)[0]
+    labels = {
+        "app.kubernetes.io/managed-by": "Helm",
+        "app.kubernetes.io/version": "0.0.0-dev",
+        "helm.sh/chart": f"{release}-0.0.0-dev",
+    }
+    image = f"oci.stackable.tech/sdp/{release}:0.0.0-dev"
+    rules = [{"apiGroups": [""], "resources": ["pods"], "verbs": ["get"]}]
+    return [
+        {
+            "apiVersion": "v1",
+            "kind": "ServiceAccount",
+            "metadata": {"name": f"{release}-serviceaccount", "labels": labels},
+        },
+        {
+            "apiVersion": "rbac.authorization.k8s.io/v1",
+            "kind": "ClusterRole",
+            "metadata": {"name": f"{release}-clusterrole", "labels": labels},
+            "rules": rules,
+        },
+        {
+            "apiVersion": "rbac.authorization.k8s.io/v1",
+            "kind": "ClusterRole",
+            "metadata": {"name": f"{product}-clusterrole", "labels": labels},
+            "rules": rules,
+        },
+        {
+            "apiVersion": "v1",
+            "kind": "ConfigMap",
+            "metadata": {"name": f"{release}-configmap", "labels": labels},
+            "data": {"properties.yaml": "version: 1\n"},
+        },
+        {
+            "apiVersion": "v1",
+            "kind": "Service",
+            "metadata": {"name": f"{release}-webhook", "labels": labels},
+            "spec": {"ports": [{"port": 8443}]},
+        },
+        {
+            "apiVersion": "apps/v1",
+            "kind": "Deployment",
+            "metadata": {"name": f"{release}-deployment", "labels": labels},
+            "spec": {
+                "template": {
+                    "metadata": {
+                        "annotations": {"internal.stackable.tech/image": image}
+                    },
+                    "spec": {"containers": [{"name": release, "image": image}]},
+                }
+            },
+        },
+        *(
+            with_labels(
+                synthetic_crd(i, properties, f"{product}.stackable.tech"), labels
+            )
+            for i in range(crds)
+        ),
+    ]
+
+
+def main(argv) -> int:
+    if argv[1:2] == ["version"]:
+        print("v3.99.0+fake")
+        return 0
+    if argv[1:2] != ["template"]:
+        print(f"fake helm: unsupported command {argv[1:]}", file=sys.stderr)
+        return 1
+
+    docs = chart(
+        argv[2],
+        int(os.environ.get("FAKE_HELM_CRDS", "10")),
+        int(os.environ.get("FAKE_HELM_PROPERTIES", "20")),
+    )
+    yaml.dump_all(
+        docs, sys.stdout, Dumper=getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,134 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#   "pyyaml",
+# ]
+# ///
+"""
+Compare the pure Python and the LibYAML code paths of build-manifests.py on large synthetic CRDs.
+
+The CRDs mimic the OpenAPI schemas of the Stackable operators: deeply nested
+properties with long, multi-line descriptions.
+
+Usage:
+
+    ./olm/benchmarks/yaml_backends.py --crds 5 --properties 60
+"""
+
+import argparse
+import importlib.util
+import pathlib
+import sys
+import time
+
+import yaml
+
+
+def load_build_manifests():
+    path = pathlib.Path(__file__).parent.parent / "build-manifests.py"
+    spec = importlib.util.spec_from_file_location("build_manifests", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def synthetic_schema(properties: int, depth: int) -> dict:
+    description = (
+        "Configuration of the component. This is a long description which spans"
+        " several lines once it is dumped, just like the ones generated from the"
+        " Rust doc comments of the operators.\n\nSee the documentation for details."
+    )
+    if depth == 0:
+        return {"type": "string", "nullable": True, "description": description}
+    return {
+        "type": "object",
+        "description": description,
+        "properties": {
+            f"field{i}": synthetic_schema(properties // 4, depth - 1)
+            for i in range(max(properties, 1))
+        },
+        "required": [f"field{i}" for i in range(0, max(properties, 1), 3)],
+    }
+
+
+def synthetic_crd(
+    index: int, properties: int, group: str = "example.stackable.tech"
+) -> dict:
+    return {
+        "apiVersion": "apiextensions.k8s.io/v1",
+        "kind": "CustomResourceDefinition",
+        "metadata": {"name": f"cluster{index}s.{group}"},
+        "spec": {
+            "group": group,
+            "names": {"kind": f"Cluster{index}", "plural": f"cluster{index}s"},
+            "scope": "Namespaced",
+            "versions": [
+                {
+                    "name": "v1alpha1",
+                    "served": True,
+                    "storage": True,
+                    "schema": {"openAPIV3Schema": synthetic_schema(properties, 3)},
+                }
+            ],
+        },
+    }
+
+
+def timed(fn, repeat: int) -> tuple[float, object]:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(argv) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--crds", type=int, default=5, help="Number of CRDs.")
+    parser.add_argument(
+        "--properties", type=int, default=40, help="Properties per schema level."
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions per run.")
+    args = parser.parse_args(argv[1:])
+
+    bm = load_build_manifests()
+    if bm.YamlDumper is None:
+        print("PyYAML was built without LibYAML. Nothing to compare.")
+        return 1
+
+    crds = [synthetic_crd(i, args.properties) for i in range(args.crds)]
+    text = "---\n".join(yaml.dump(crd) for crd in crds)
+    print(f"{args.crds} CRDs, {len(text) / 1e6:.1f} MB of YAML")
+
+    load_py, parsed_py = timed(
+        lambda: list(yaml.load_all(text, Loader=yaml.SafeLoader)), args.repeat
+    )
+    load_c, parsed_c = timed(
+        lambda: list(yaml.load_all(text, Loader=bm.YamlLoader)), args.repeat
+    )
+    dump_py, dumped_py = timed(lambda: [yaml.dump(c) for c in crds], args.repeat)
+    dump_c, dumped_c = timed(lambda: [bm.dump_yaml(c) for c in crds], args.repeat)
+
+    # Mapping keys the pure Python emitter writes as complex keys ("? key")
+    edge_cases = [
+        {"metadata": {"annotations": {"": "empty key"}}},
+        {"metadata": {"annotations": {"a" * 128: "long key"}}},
+    ]
+    if any(yaml.dump(c) != bm.dump_yaml(c) for c in edge_cases):
+        print("LibYAML output differs for empty or long mapping keys!")
+        return 1
+    if parsed_py != parsed_c or dumped_py != dumped_c:
+        print("Output of the LibYAML code path differs from the pure Python one!")
+        return 1
+
+    print(f"{'':6} {'python':>9} {'libyaml':>9} {'speedup':>8}")
+    for name, py, c in [("load", load_py, load_c), ("dump", dump_py, dump_c)]:
+        print(f"{name:6} {py:8.2f}s {c:8.2f}s {py / c:7.1f}x")
+    print("Output is identical.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -23,26 +23,198 @@ Requirements:
     - helm  (https://helm.sh)
 """
 
+# Modules that are only needed by some code paths (e.g. http.client, json,
+# subprocess) are imported where they are used, so that the script starts fast.
 import argparse
-import json
+import contextlib
+import copy
+import dataclasses
+import errno
+import functools
+import hashlib
+import importlib.util
+import inspect
 import logging
 import os
 import pathlib
 import re
 import shutil
-import subprocess
 import sys
-import urllib.parse
-import urllib.request
+import threading
+import time
+
+from collections.abc import Iterable, Iterator
 
 import yaml
 
+# Use the LibYAML bindings when PyYAML was built with them.
+try:
+    from yaml import CSafeDumper as YamlDumper
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    YamlDumper = None
+    from yaml import SafeLoader as YamlLoader
+
 __version__ = "0.0.1"
 
+# Kinds of objects that are embedded in the CSV.
+CSV_SOURCE_KINDS = {"ClusterRole", "ServiceAccount", "Deployment"}
+
+# These operators have their own OLM generation script in their repository.
+UNSUPPORTED_OPERATORS = {"secret-operator", "listener-operator"}
+
+# Images of these registries are published on quay.io as well.
+STACKABLE_REGISTRIES = {"oci.stackable.tech", "docker.stackable.tech"}
+# Version of the operators and the Helm charts on the main branch.
+DEV_RELEASE = "0.0.0-dev"
+QUAY_API_URL = "https://quay.io"
+DOCKER_HUB_URL = "https://registry-1.docker.io"
+QUAY_MAX_WORKERS = 8
+QUAY_RETRIES = 4
+QUAY_BACKOFF_BASE = 0.5
+QUAY_TIMEOUT = 30
+
+# Media types of multi-arch images. Single-arch manifests are requested as well
+# to be able to tell that a tag is not a manifest list.
+MANIFEST_LIST_TYPES = [
+    "application/vnd.oci.image.index.v1+json",
+    "application/vnd.docker.distribution.manifest.list.v2+json",
+]
+MANIFEST_ACCEPT = ", ".join(
+    [
+        *MANIFEST_LIST_TYPES,
+        "application/vnd.oci.image.manifest.v1+json",
+        "application/vnd.docker.distribution.manifest.v2+json",
+    ]
+)
+# key="value" pairs of a WWW-Authenticate header.
+AUTH_PARAM = re.compile(r'(\w+)="([^"]*)"')
+
+CACHE_DIR = (
+    pathlib.Path(os.environ.get("XDG_CACHE_HOME", pathlib.Path.home() / ".cache"))
+    / "stackable-utils"
+)
+DIGEST_CACHE_PATH = CACHE_DIR / "digests.sqlite"
+DIGEST_CACHE_TTL_HOURS = 24
+DIGEST_CACHE_MAX_ENTRIES = 10000
+RENDER_CACHE_DIR = CACHE_DIR / "helm"
+RENDER_CACHE_MAX_ENTRIES = 64
+
+RESOURCES_DIR = pathlib.Path(__file__).parent / "resources"
+
+# See rename(2).
+AT_FDCWD = -100
+RENAME_EXCHANGE = 2
+
+# See inotify(7). Events are read as struct inotify_event followed by the file name.
+INOTIFY_EVENT_FORMAT = "iIII"
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (
+    IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+)
+# Seconds without further changes before the bundle is rebuilt.
+WATCH_DEBOUNCE = 0.2
+WATCH_POLL_INTERVAL = 0.2
+
 class ManifestException(Exception):
     pass
 
 
+class ImageNotFoundException(ManifestException):
+    pass
+
+
+class Tracer:
+    """Records the duration of the build stages as Chrome trace events.
+
+    The events can be loaded in https://ui.perfetto.dev or chrome://tracing.
+    Nothing is recorded unless `enabled` is set.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.events: list[dict] = []
+
+    def record(self, name: str, start: float, end: float, **args) -> None:
+        self.events.append(
+            {
+                "name": name,
+                "ph": "X",
+                "ts": start * 1e6,
+                "dur": (end - start) * 1e6,
+                "pid": os.getpid(),
+                "tid": threading.get_native_id(),
+                "args": args,
+            }
+        )
+
+    @contextlib.contextmanager
+    def span(self, name: str, **args) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter(), **args)
+
+    def iterate(self, name: str, items: Iterator) -> Iterator:
+        """Record every step of `items` as a separate span.
+
+        The time the consumer spends between two items is not attributed to `name`.
+        """
+        end = object()
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(items, end)
+                finally:
+                    self.record(name, start, time.perf_counter())
+                if item is end:
+                    return
+                yield item
+        finally:
+            items.close()
+
+
+TRACER = Tracer()
+
+
+def traced(name: str):
+    """Decorator recording the calls of a function or generator function with TRACER."""
+
+    def decorator(fn):
+        if inspect.isgeneratorfunction(fn):
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                items = fn(*args, **kwargs)
+                return TRACER.iterate(name, items) if TRACER.enabled else items
+
+        else:
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not TRACER.enabled:
+                    return fn(*args, **kwargs)
+                with TRACER.span(name):
+                    return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
 def parse_args(argv: list[str]) -> argparse.Namespace:
     """Parse command line args."""
     parser = argparse.ArgumentParser(
@@ -74,9 +246,30 @@ def parse_args(argv: list[str]) -> argparse.Namespace:
     parser.add_argument(
         "-o",
         "--repo-operator",
-        help="Path to the root of the operator repository.",
+        help="Path to the root of the operator repository. Can be given multiple times to build several bundles in one run.",
         type=pathlib.Path,
-        required=True,
+        action="append",
+        default=[],
+    )
+
+    parser.add_argument(
+        "--release-config",
+        help="Build bundles for all operators listed in this release configuration (e.g. release/config.yaml). Requires --repo-root.",
+        type=pathlib.Path,
+    )
+
+    parser.add_argument(
+        "--repo-root",
+        help="Directory containing the operator repository checkouts. Used together with --release-config.",
+        type=pathlib.Path,
+    )
+
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        help="Maximum number of bundles to build in parallel. Default: number of CPUs.",
+        type=cli_positive_int,
+        default=os.cpu_count() or 1,
     )
 
     parser.add_argument(
@@ -108,66 +301,289 @@ def parse_args(argv: list[str]) -> argparse.Namespace:
         action="store_true",
     )
 
+    parser.add_argument(
+        "--pin-helm-images",
+        help="Use the images from the Helm chart (like --use-helm-images) but pin them to their digests in the registry they come from (e.g. oci.stackable.tech).",
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "--registry-url",
+        help="Use this base URL for the registry HOST, e.g. oci.stackable.tech=http://localhost:5000. Can be given multiple times.",
+        metavar="HOST=URL",
+        type=cli_registry_url,
+        action="append",
+        default=[],
+    )
+
+    parser.add_argument(
+        "--quay-url",
+        help=f"Base URL of the quay.io registry. Default: {QUAY_API_URL}",
+        default=QUAY_API_URL,
+    )
+
+    parser.add_argument(
+        "--digest-cache",
+        help=f"Path of the image digest cache. Default: {DIGEST_CACHE_PATH}",
+        type=pathlib.Path,
+        default=DIGEST_CACHE_PATH,
+    )
+
+    parser.add_argument(
+        "--digest-cache-ttl",
+        help=f"Number of hours a cached image digest is considered valid. Default: {DIGEST_CACHE_TTL_HOURS}",
+        type=float,
+        default=DIGEST_CACHE_TTL_HOURS,
+    )
+
+    cache_mode = parser.add_mutually_exclusive_group()
+    cache_mode.add_argument(
+        "--offline",
+        help="Do not contact quay.io. Resolve image digests from the cache only.",
+        action="store_true",
+    )
+    cache_mode.add_argument(
+        "--refresh",
+        help="Ignore cached image digests and fetch them again from quay.io.",
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "--render-cache",
+        help=f"Directory of the Helm render cache. Default: {RENDER_CACHE_DIR}",
+        type=pathlib.Path,
+        default=RENDER_CACHE_DIR,
+    )
+
+    parser.add_argument(
+        "--no-render-cache",
+        help="Always run 'helm template' and do not cache the result.",
+        dest="render_cache",
+        action="store_const",
+        const=None,
+    )
+
+    parser.add_argument(
+        "--render-cache-status",
+        help="Print whether the Helm templates were loaded from the render cache.",
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "--check",
+        help="Do not write anything. Show the differences to the existing bundle and exit with 1 if there are any.",
+        action="store_true",
+    )
+
     parser.add_argument(
         "--channel",
         help="Channel name to use for the OLM bundle. Default: <major>.<minor> from the release number or 'alpha' for '0.0.0-dev'",
     )
 
-    args = parser.parse_args(argv)
+    parser.add_argument(
+        "--preflight",
+        help="Validate the bundle with validate-bundles.py before writing it. Nothing is written if it is invalid.",
+        action="store_true",
+    )
 
-    # Default to the actual release if no quay release is given
-    if not args.quay_release:
-        args.quay_release = args.release
+    parser.add_argument(
+        "--variant",
+        help="Build another variant of the bundle from the same Helm render, e.g. release=26.3.1,channel=26.3,openshift-versions=v4.19-v4.22,output=DIR. "
+        "Keys: release, quay-release, channel, openshift-versions, output. Omitted keys default to the other arguments. Can be given multiple times.",
+        metavar="KEY=VALUE,...",
+        type=cli_variant,
+        action="append",
+        default=[],
+    )
 
-    if not args.repo_certified_operators:
-        args.repo_certified_operators = (
-            args.repo_operator.parent / "openshift-certified-operators"
-        )
+    parser.add_argument(
+        "--watch",
+        help="Keep running and rebuild the bundle whenever the Helm chart, the OLM values or the resource templates change.",
+        action="store_true",
+    )
 
-    # Get the product name from the operator path. This removes -operator from the product name.
-    args.product = args.repo_operator.name.rsplit("-", maxsplit=1)[0]
-    args.op_name = args.repo_operator.name
+    parser.add_argument(
+        "--compact-manifests",
+        help="Intern strings and share identical CRD subtrees to reduce memory when building many bundles in one process. The output does not change.",
+        action="store_true",
+    )
 
-    if args.op_name in {"secret-operator", "listener-operator"}:
-        raise ManifestException(
-            f"Operator '{args.op_name}' is not supported by this script. Use the 'build-manifests.sh' for it."
+    parser.add_argument(
+        "--timings",
+        help="Print the time spent in each stage of the bundle generation.",
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "--trace-file",
+        help="Write the duration of each stage as Chrome trace events (JSON) to this file. View it in https://ui.perfetto.dev",
+        type=pathlib.Path,
+    )
+
+    args = parser.parse_args(argv)
+    args.registry_url = dict(args.registry_url)
+
+    if args.release_config:
+        if not args.repo_root:
+            parser.error("--repo-root is required when using --release-config")
+        args.repo_operator.extend(
+            args.repo_root / op
+            for op in load_release_operators(args.release_config)
+            if op not in UNSUPPORTED_OPERATORS
         )
 
-    args.op_name = args.repo_operator.name
+    if not args.repo_operator:
+        parser.error("either --repo-operator or --release-config is required")
 
-    # In case of spark, -k8s is still in the product name but the target directory
-    # in the certification repository is without -k8s.
-    # This has historical reasons and because it's impossible to rename the path of an existing operator
-    # in the certification repository we need to rename the target directory here.
-    dir_name = (
-        "spark-operator" if args.product == "spark-k8s" else f"{args.product}-operator"
-    )
-    args.dest_dir = (
-        args.repo_certified_operators
-        / "operators"
-        / f"stackable-{dir_name}"
-        / args.release
-    )
+    if len(args.repo_operator) > 1 and any("output_dir" in v for v in args.variant):
+        parser.error("--variant output=DIR is only supported for a single operator")
 
-    ### Validate paths
-    if not (args.repo_operator / "deploy" / "helm" / args.repo_operator.name).exists():
-        raise ManifestException(
-            f"Operator repository path not found {args.repo_operator} or missing helm chart"
+    if len(args.repo_operator) > 1 and args.watch:
+        parser.error("--watch is only supported for a single operator")
+
+    return args
+
+
+@dataclasses.dataclass
+class BundleConfig:
+    """Options for building the bundle of a single operator.
+
+    Most fields correspond to the command line arguments of the same name.
+    """
+
+    release: str
+    repo_operator: pathlib.Path
+    repo_certified_operators: pathlib.Path
+    openshift_versions: str
+    # Defaults to the release
+    quay_release: str | None = None
+    # Defaults to <major>.<minor> of the release or 'alpha' for '0.0.0-dev'
+    channel: str | None = None
+    use_helm_images: bool = False
+    pin_helm_images: bool = False
+    quay_url: str = QUAY_API_URL
+    registry_url: dict[str, str] = dataclasses.field(default_factory=dict)
+    digest_cache: pathlib.Path = DIGEST_CACHE_PATH
+    digest_cache_ttl: float = DIGEST_CACHE_TTL_HOURS
+    offline: bool = False
+    refresh: bool = False
+    render_cache: pathlib.Path | None = RENDER_CACHE_DIR
+    render_cache_status: bool = False
+    check: bool = False
+    compact_manifests: bool = False
+    preflight: bool = False
+    # Write the bundle here instead of the release directory in the certification repository
+    output_dir: pathlib.Path | None = None
+
+    def __post_init__(self):
+        if self.pin_helm_images:
+            self.use_helm_images = True
+
+        # Default to the actual release if no quay release is given
+        if not self.quay_release:
+            self.quay_release = self.release
+
+        ### Set bundle default channel
+        if not self.channel:
+            if self.release == "0.0.0-dev":
+                self.channel = "alpha"
+            else:
+                self.channel = ".".join(self.release.split(".")[:2])
+
+    @classmethod
+    def from_args(
+        cls, args: argparse.Namespace, repo_operator: pathlib.Path
+    ) -> "BundleConfig":
+        """Derive the options for building the bundle of a single operator from the command line args."""
+        options = {
+            f.name: getattr(args, f.name)
+            for f in dataclasses.fields(cls)
+            if hasattr(args, f.name)
+        }
+        options["repo_operator"] = repo_operator
+        if not args.repo_certified_operators:
+            options["repo_certified_operators"] = (
+                repo_operator.parent / "openshift-certified-operators"
+            )
+        return cls(**options)
+
+    @property
+    def op_name(self) -> str:
+        return self.repo_operator.name
+
+    @property
+    def product(self) -> str:
+        # Get the product name from the operator path. This removes -operator from the product name.
+        return self.op_name.rsplit("-", maxsplit=1)[0]
+
+    @property
+    def dest_dir(self) -> pathlib.Path:
+        if self.output_dir:
+            return self.output_dir
+        # In case of spark, -k8s is still in the product name but the target directory
+        # in the certification repository is without -k8s.
+        # This has historical reasons and because it's impossible to rename the path of an existing operator
+        # in the certification repository we need to rename the target directory here.
+        dir_name = (
+            "spark-operator"
+            if self.product == "spark-k8s"
+            else f"{self.product}-operator"
+        )
+        return (
+            self.repo_certified_operators
+            / "operators"
+            / f"stackable-{dir_name}"
+            / self.release
         )
-    if not (
-        args.repo_certified_operators / "operators" / "stackable-airflow-operator"
-    ).exists():
+
+    def validate(self, writing: bool = True) -> None:
+        """Check that the operator is supported and the repositories exist.
+
+        The certification repository is only needed when `writing` the bundle.
+        """
+        if self.op_name in UNSUPPORTED_OPERATORS:
+            raise ManifestException(
+                f"Operator '{self.op_name}' is not supported by this script. Use the 'build-manifests.sh' for it."
+            )
+
+        ### Validate paths
+        if not (self.repo_operator / "deploy" / "helm" / self.op_name).exists():
+            raise ManifestException(
+                f"Operator repository path not found {self.repo_operator} or missing helm chart"
+            )
+        if (
+            writing
+            and not (
+                self.repo_certified_operators
+                / "operators"
+                / "stackable-airflow-operator"
+            ).exists()
+        ):
+            raise ManifestException(
+                f"Certification repository path not found: {self.repo_certified_operators} or it's not a certified operator repository"
+            )
+
+
+def load_release_operators(config_path: pathlib.Path) -> list[str]:
+    """Read the list of operators from the release configuration."""
+    try:
+        return yaml.load(config_path.read_text(), Loader=YamlLoader)["operators"]
+    except FileNotFoundError:
+        raise ManifestException(f"Release configuration '{config_path}' not found")
+    except (KeyError, TypeError, yaml.YAMLError) as e:
         raise ManifestException(
-            f"Certification repository path not found: {args.repo_certified_operators} or it's not a certified operator repository"
+            f"Error while loading release configuration '{config_path}': {e}"
         )
 
-    ### Set bundle default channel
-    if not args.channel:
-        if args.release == "0.0.0-dev":
-            args.channel = "alpha"
-        else:
-            args.channel = ".".join(args.release.split(".")[:2])
-    return args
+
+def cli_positive_int(cli_arg: str) -> int:
+    try:
+        value = int(cli_arg)
+    except ValueError:
+        value = 0
+    if value < 1:
+        raise argparse.ArgumentTypeError("Expected a positive integer")
+    return value
 
 
 def cli_validate_openshift_range(cli_arg: str) -> str:
@@ -188,6 +604,38 @@ def cli_parse_release(cli_arg: str) -> str:
     )
 
 
+def cli_registry_url(cli_arg: str) -> tuple[str, str]:
+    host, sep, url = cli_arg.partition("=")
+    if not sep or not re.match(r"^https?://", url):
+        raise argparse.ArgumentTypeError(
+            "Invalid registry URL. Example: oci.stackable.tech=http://localhost:5000"
+        )
+    return host, url.rstrip("/")
+
+
+# Variant keys on the command line -> (BundleConfig field, parser)
+VARIANT_KEYS = {
+    "release": ("release", cli_parse_release),
+    "quay-release": ("quay_release", cli_parse_release),
+    "channel": ("channel", str),
+    "openshift-versions": ("openshift_versions", cli_validate_openshift_range),
+    "output": ("output_dir", pathlib.Path),
+}
+
+
+def cli_variant(cli_arg: str) -> dict:
+    variant = {}
+    for item in cli_arg.split(","):
+        key, sep, value = item.partition("=")
+        if not sep or key not in VARIANT_KEYS or not value:
+            raise argparse.ArgumentTypeError(
+                f"Invalid variant '{item}'. Expected KEY=VALUE with KEY one of {', '.join(VARIANT_KEYS)}"
+            )
+        field, parse = VARIANT_KEYS[key]
+        variant[field] = parse(value)
+    return variant
+
+
 def cli_log_level(cli_arg: str) -> int:
     match cli_arg:
         case "debug":
@@ -204,34 +652,337 @@ def cli_log_level(cli_arg: str) -> int:
             raise argparse.ArgumentTypeError("Invalid log level")
 
 
+# Strings the emitter writes in double-quoted style: non-printable or non-ASCII
+# characters and spaces around line breaks.
+DOUBLE_QUOTED_SCALAR = re.compile(r"[^\n\x20-\x7e]| \n|\n ")
+# The pure Python emitter writes empty keys and keys that are 128 characters or
+# longer together with their "!!str" tag as complex keys ("? key"), LibYAML does not.
+MAX_SIMPLE_KEY_LENGTH = 128 - len("!!str")
+
+
+def has_double_quoted_scalars(data) -> bool:
+    if isinstance(data, str):
+        return DOUBLE_QUOTED_SCALAR.search(data) is not None
+    if isinstance(data, dict):
+        return any(
+            has_double_quoted_scalars(k)
+            or (isinstance(k, str) and is_complex_key(k))
+            or has_double_quoted_scalars(v)
+            for k, v in data.items()
+        )
+    if isinstance(data, list):
+        return any(has_double_quoted_scalars(v) for v in data)
+    return False
+
+
+def is_complex_key(key: str) -> bool:
+    return "\n" in key or not key or len(key) >= MAX_SIMPLE_KEY_LENGTH
+
+
+class NoAliasDumper(yaml.Dumper):
+    """Writes objects that occur more than once (see `ManifestCompactor`) in full instead of as aliases."""
+
+    def ignore_aliases(self, data) -> bool:
+        return True
+
+
+if YamlDumper is not None:
+
+    class NoAliasCDumper(YamlDumper):
+        def ignore_aliases(self, data) -> bool:
+            return True
+
+
+def dump_yaml(data: dict) -> str:
+    """Dump a manifest to YAML with the same output as `yaml.dump()`.
+
+    The LibYAML emitter is used if available. It folds long double-quoted
+    scalars and writes empty or long mapping keys differently than the pure
+    Python emitter, so documents containing such scalars or keys are always
+    dumped with the latter.
+    """
+    if YamlDumper is not None and not has_double_quoted_scalars(data):
+        return yaml.dump(data, Dumper=NoAliasCDumper)
+    return yaml.dump(data, Dumper=NoAliasDumper)
+
+
+class ManifestCompactor:
+    """Reduce the memory used by parsed manifests.
+
+    All strings are interned. Identical subtrees of CRDs are replaced by a
+    single shared instance (hash-consing), both within one CRD and across all
+    CRDs compacted by the same instance. Shared subtrees must not be modified,
+    which is why only CRDs are hash-consed: they are not patched after the Helm
+    transforms. `dump_yaml` writes shared subtrees in full, so the YAML output
+    does not change.
+    """
+
+    def __init__(self):
+        # Structure of a subtree -> its shared instance
+        self.table: dict[tuple, dict | list] = {}
+
+    def compact(self, manifest: dict) -> dict:
+        if manifest.get("kind") == "CustomResourceDefinition":
+            return self.share(manifest)
+        return intern_strings(manifest)
+
+    def share(self, data):
+        """Return the shared instance of a subtree equal to `data`."""
+        if isinstance(data, dict):
+            items = [(self.share(k), self.share(v)) for k, v in data.items()]
+            key = ("d", *(self.key(k) for kv in items for k in kv))
+        elif isinstance(data, list):
+            items = [self.share(v) for v in data]
+            key = ("l", *(self.key(v) for v in items))
+        elif isinstance(data, str):
+            return sys.intern(data)
+        else:
+            return data
+        shared = self.table.get(key)
+        if shared is None:
+            shared = self.table[key] = dict(items) if key[0] == "d" else items
+        return shared
+
+    @staticmethod
+    def key(value) -> object:
+        # Shared subtrees are kept alive by the table, so their id identifies their structure.
+        if isinstance(value, (dict, list)):
+            return id(value)
+        # Distinguish 1, 1.0 and True
+        return type(value), value
+
+
+def intern_strings(data):
+    """Return `data` with all strings (keys and values) interned. Dicts and lists are modified in place."""
+    if isinstance(data, dict):
+        items = [(intern_strings(k), intern_strings(v)) for k, v in data.items()]
+        data.clear()
+        data.update(items)
+    elif isinstance(data, list):
+        data[:] = [intern_strings(v) for v in data]
+    elif isinstance(data, str):
+        return sys.intern(data)
+    return data
+
+
 def load_resource(file_name: str) -> dict:
-    res_path = pathlib.Path(__file__).parent / "resources" / file_name
+    """Return a copy of a resource template that can be modified by the caller."""
+    return copy.deepcopy(parse_resource(file_name))
+
+
+@functools.cache
+def parse_resource(file_name: str) -> dict:
+    """Parse a resource template. Each file is parsed only once per process."""
+    res_path = RESOURCES_DIR / file_name
     try:
-        return yaml.load(res_path.read_text(), Loader=yaml.SafeLoader)
+        return yaml.load(res_path.read_text(), Loader=YamlLoader)
     except FileNotFoundError:
         raise ManifestException(f"Resource file '{res_path}' not found")
     except yaml.YAMLError as e:
         raise ManifestException(f"Error while loading resource file '{res_path}': {e}")
 
 
-def generate_csv_related_images(
-    args: argparse.Namespace, containers: list[dict]
-) -> list[dict]:
-    if args.use_helm_images:
-        return [
-            {"name": args.op_name, "image": c["image"]}
-            for c in containers
-            if c["name"] == args.op_name
-        ]
-    else:
-        return quay_image([(args.op_name, args.quay_release)])
+def generate_csv_related_images(args: BundleConfig, images: list[str]) -> list[dict]:
+    """Build the list of related images for the CSV.
+
+    The images are those referenced by the Helm manifests with the operator image first.
+    They are resolved to their manifest list digests. Unless '--use-helm-images' is given,
+    images from the Stackable registries are looked up on quay.io (see `quay_reference`).
+    All other images, and with '--pin-helm-images' all images, are resolved in the
+    registry they are referenced from.
+    """
+    if args.use_helm_images and not args.pin_helm_images:
+        return [{"name": image_name(image), "image": image} for image in images]
+
+    refs = []
+    for image in images:
+        quay_ref = None if args.use_helm_images else quay_reference(args, image)
+        refs.append(
+            ("quay.io", f"stackable/{quay_ref[0]}", quay_ref[1])
+            if quay_ref
+            else split_image(image)
+        )
+
+    cache = DigestCache(args.digest_cache, args.digest_cache_ttl * 3600)
+    try:
+        digests = registry_digests(
+            [
+                (registry_base_url(args, registry), repository, tag)
+                for registry, repository, tag in refs
+            ],
+            cache=cache,
+            offline=args.offline,
+            refresh=args.refresh,
+        )
+    except ImageNotFoundException as e:
+        if args.use_helm_images:
+            raise ManifestException(
+                f"{e}. Check that the images referenced by the Helm chart have been pushed."
+            )
+        raise ManifestException(
+            f"{e}. Pass '--use-helm-images' to use the images from the Helm chart instead."
+        )
+    finally:
+        cache.close()
+    return [
+        {"name": image_name(image), "image": f"{registry}/{repository}@{digest}"}
+        for image, (registry, repository, _), digest in zip(images, refs, digests)
+    ]
+
+
+def split_image(image: str) -> tuple[str, str, str]:
+    """Split an image reference into registry, repository and tag (or digest)."""
+    name, at, digest = image.partition("@")
+    registry, _, repository = name.partition("/")
+    if not repository or not re.search(r"[.:]|^localhost$", registry):
+        # Docker Hub image, e.g. "vector" or "timberio/vector:latest"
+        registry, repository = "docker.io", name
+        if "/" not in repository:
+            repository = f"library/{repository}"
+    repository, colon, tag = repository.rpartition(":")
+    if not colon or "/" in tag:
+        repository, tag = f"{repository}{colon}{tag}", "latest"
+    return registry, repository, digest if at else tag
+
+
+def registry_base_url(args: BundleConfig, registry: str) -> str:
+    """Return the base URL of the distribution API of a registry."""
+    if registry in args.registry_url:
+        return args.registry_url[registry]
+    if registry == "quay.io":
+        return args.quay_url
+    if registry == "docker.io":
+        return DOCKER_HUB_URL
+    return f"https://{registry}"
+
+
+def image_name(image: str) -> str:
+    """Return the repository name of an image reference without registry, project and tag."""
+    return image.split("@", maxsplit=1)[0].rsplit("/", maxsplit=1)[-1].split(":")[0]
+
+
+def quay_reference(args: BundleConfig, image: str) -> tuple[str, str] | None:
+    """Return the (name, tag) to look up on quay.io for an image referenced by the Helm chart.
+
+    Only the images of the Stackable registries are published on quay.io. The operator
+    image always uses the quay release. Other images (e.g. product images) keep their
+    tag with the release (or the version of development charts) replaced by the quay
+    release. Returns None if the image is not on quay.io or its tag contains neither.
+    """
+    registry, _, tag = split_image(image)
+    if registry not in STACKABLE_REGISTRIES:
+        return None
+    name = image_name(image)
+    if name == args.op_name:
+        return name, args.quay_release
+    for version in (args.release, DEV_RELEASE):
+        if version in tag:
+            return name, tag.replace(version, args.quay_release)
+    return None
+
+
+def pod_containers(manifest: dict) -> list[dict]:
+    """Return all (init) containers of a workload manifest or an empty list for other objects."""
+    try:
+        if manifest["kind"] == "CronJob":
+            pod_spec = manifest["spec"]["jobTemplate"]["spec"]["template"]["spec"]
+        else:
+            pod_spec = manifest["spec"]["template"]["spec"]
+    except (KeyError, TypeError):
+        return []
+    return [*pod_spec.get("initContainers", []), *pod_spec.get("containers", [])]
+
+
+ManifestKey = tuple[str, str, str | None, str]
+
+
+class ManifestSet:
+    """Manifests indexed by (apiVersion, kind, namespace, name).
 
+    Provides constant time lookups of the objects that are embedded in the CSV
+    and the containers of all workloads.
+    """
+
+    def __init__(self, manifests: Iterable[dict] = ()):
+        self._index: dict[ManifestKey, dict] = {}
+        self._by_kind_name: dict[tuple[str, str], list[dict]] = {}
+        self._containers: list[dict] = []
+        for m in manifests:
+            self.add(m)
+
+    @staticmethod
+    def key(m: dict) -> ManifestKey:
+        return (
+            m["apiVersion"],
+            m["kind"],
+            m["metadata"].get("namespace"),
+            m["metadata"]["name"],
+        )
+
+    def add(self, m: dict) -> None:
+        key = self.key(m)
+        if key in self._index:
+            raise ManifestException(f"Duplicate object {key} in Helm templates")
+        self._index[key] = m
+        self._by_kind_name.setdefault((m["kind"], m["metadata"]["name"]), []).append(m)
+        self._containers.extend(pod_containers(m))
+
+    def require(self, kind: str, name: str) -> dict:
+        """Return the only object with this kind and name."""
+        found = self._by_kind_name.get((kind, name), [])
+        if not found:
+            raise ManifestException(f"Could not find '{name}' in Helm templates")
+        if len(found) > 1:
+            keys = ", ".join(str(self.key(m)) for m in found)
+            raise ManifestException(
+                f"Found more than one {kind} '{name}' in Helm templates: {keys}"
+            )
+        return found[0]
+
+    def op_cluster_role(self, op_name: str) -> dict:
+        return self.require("ClusterRole", f"{op_name}-clusterrole")
+
+    def op_service_account(self, op_name: str) -> dict:
+        return self.require("ServiceAccount", f"{op_name}-serviceaccount")
+
+    def op_deployment(self, op_name: str) -> dict:
+        return self.require("Deployment", f"{op_name}-deployment")
+
+    def containers(self) -> list[dict]:
+        """All (init) containers of all workloads."""
+        return self._containers
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter(self._index.values())
+
+    def __len__(self) -> int:
+        return len(self._index)
 
-def generate_manifests(args: argparse.Namespace) -> list[dict]:
+
+def generate_manifests(
+    args: BundleConfig, helm_manifests: Iterable[dict] | None = None
+) -> Iterator[dict]:
+    """Yield the bundle manifests while the Helm templates are being rendered.
+
+    Objects that are only written to disk (e.g. CRDs) are passed on as soon as
+    they are parsed. Objects needed for the CSV are kept until the Helm output
+    is complete and are yielded after the CSV.
+
+    Pass `helm_manifests` to use an already rendered chart instead of running
+    `helm template`. The CSV source objects are patched in place.
+    """
     logging.debug("start generate_manifests")
 
+    if helm_manifests is None:
+        helm_manifests = generate_helm_templates(args)
+
     # Parse Helm manifests
-    manifests = generate_helm_templates(args)
+    manifests = ManifestSet()
+    for m in helm_manifests:
+        if m["kind"] in CSV_SOURCE_KINDS or pod_containers(m):
+            manifests.add(m)
+        else:
+            yield m
 
     #
     # Prepare various pieces for the CSV
@@ -242,25 +993,26 @@ def generate_manifests(args: argparse.Namespace) -> list[dict]:
     cluster_permissions = [(op_service_account["metadata"]["name"], op_cluster_role)]
     deployments = [op_deployment]
 
-    related_images = generate_csv_related_images(
-        args, op_deployment["spec"]["template"]["spec"]["containers"]
+    # Collect all images referenced by the manifests. The operator image must come first
+    # because it's used as the CSV container image.
+    op_images = [
+        c["image"] for c in pod_containers(op_deployment) if c["name"] == args.op_name
+    ]
+    helm_images = list(
+        dict.fromkeys([*op_images, *(c["image"] for c in manifests.containers())])
     )
 
-    if not args.use_helm_images:
-        # patch the image of the operator container with the quay.io image
-        for c in op_deployment["spec"]["template"]["spec"]["containers"]:
-            if c["name"] == args.op_name:
-                c["image"] = related_images[0]["image"]
-        # patch the annotation image of the operator deployment with the quay.io image
-        try:
-            if op_deployment["spec"]["template"]["metadata"]["annotations"][
-                "internal.stackable.tech/image"
-            ]:
-                op_deployment["spec"]["template"]["metadata"]["annotations"][
-                    "internal.stackable.tech/image"
-                ] = related_images[0]["image"]
-        except KeyError:
-            pass
+    related_images = generate_csv_related_images(args, helm_images)
+
+    if not args.use_helm_images or args.pin_helm_images:
+        patch_images(
+            manifests,
+            op_deployment,
+            {
+                helm_image: related["image"]
+                for helm_image, related in zip(helm_images, related_images)
+            },
+        )
 
     # Generate the CSV
     csv = generate_csv(
@@ -271,90 +1023,87 @@ def generate_manifests(args: argparse.Namespace) -> list[dict]:
     )
 
     logging.debug("finish generate_manifests")
-    return [csv, *manifests]
+    yield csv
+    yield from manifests
 
 
-def filter_op_objects(args: argparse.Namespace, manifests) -> tuple[dict, dict, dict]:
+def patch_images(
+    manifests: ManifestSet, op_deployment: dict, images: dict[str, str]
+) -> None:
+    """Replace the Helm images of all containers with the resolved images.
+
+    The image annotation of the operator deployment is set to the operator image,
+    which is the first one in `images`.
+    """
+    for c in manifests.containers():
+        c["image"] = images[c["image"]]
+    try:
+        annotations = op_deployment["spec"]["template"]["metadata"]["annotations"]
+        if annotations["internal.stackable.tech/image"]:
+            annotations["internal.stackable.tech/image"] = next(iter(images.values()))
+    except KeyError:
+        pass
+
+
+def filter_op_objects(
+    args: BundleConfig, manifests: ManifestSet
+) -> tuple[dict, dict, dict]:
     """Extracts a tuple containing three objects that need to be embedded in the CSV.
     These are:
         * the operator cluster role
         * the operator service account
         * the operator deployment.
     """
-    logging.debug("start filter_op_objects")
-    names = [
-        f"{args.op_name}-clusterrole",
-        f"{args.op_name}-serviceaccount",
-        f"{args.op_name}-deployment",
-    ]
-
-    result = []
-    for name in names:
-        try:
-            result.append(
-                next(filter(lambda m: m["metadata"]["name"] == name, manifests))
-            )
-        except StopIteration:
-            raise ManifestException(f"Could not find '{name}' in Helm templates")
-
-    logging.debug("finish filter_op_objects")
-    return tuple(result)
+    return (
+        manifests.op_cluster_role(args.op_name),
+        manifests.op_service_account(args.op_name),
+        manifests.op_deployment(args.op_name),
+    )
 
 
-def write_manifests(args: argparse.Namespace, manifests: list[dict]) -> None:
-    """Write the manifests to the certification repository."""
-    try:
-        manifests_dir = args.dest_dir / "manifests"
-        logging.info(f"Creating directory {manifests_dir}")
-        os.makedirs(manifests_dir)
-
-        # The following objects are written as separate files:
-        # - cluster service version
-        # - cluster roles
-        # - services
-        # - config maps
-        # The other objects are embedded in the CSV. These are:
-        # - the operator cluster role (N.B. some products have more than one cluster role e.g. HDFS)
-        # - the operator deployment
-        for m in manifests:
-            dest_file = None
-            if m["kind"] == "ClusterServiceVersion":
-                dest_file = (
-                    args.dest_dir
-                    / "manifests"
-                    / f"stackable-{args.op_name}.v{args.release}.clusterserviceversion.yaml"
-                )
-            elif m["kind"] == "CustomResourceDefinition":
-                dest_file = (
-                    args.dest_dir
-                    / "manifests"
-                    / f"{m['metadata']['name']}.customresourcedefinition.yaml"
-                )
-            elif m["kind"] in ["ClusterRole", "ConfigMap", "Service"]:
-                kind = m["kind"].lower()
-                name = m["metadata"]["name"]
-                # Some objects contain the kind in their name already while others (looking at you webhook service) do not.
-                # To avoid conflicting file names we append the kind if it's not already part of the object name.
-                if kind not in m['metadata']['name']:
-                    name = f"{name}-{kind}"
-
-                dest_file = (
-                    args.dest_dir / "manifests" / f"{name}.yaml"
-                )
+@traced("write_manifests")
+def write_manifests(
+    args: BundleConfig, manifests: Iterable[dict], writer: "BundleWriter | Bundle"
+) -> None:
+    """Write the manifests to the certification repository.
 
-            if dest_file:
-                logging.info(f"Writing {dest_file}")
-                if dest_file.exists():
-                    raise ManifestException(
-                        f"Manifest file '{dest_file}' already exists"
-                    )
-                dest_file.write_text(yaml.dump(m))
+    Only objects with an entry in MANIFEST_FILE_NAMES are written as separate
+    files. The other objects are embedded in the CSV. These are:
+    - the operator cluster role (N.B. some products have more than one cluster role e.g. HDFS)
+    - the operator deployment
+    """
+    for m in manifests:
+        if file_name := MANIFEST_FILE_NAMES.get(m["kind"]):
+            writer.write(pathlib.Path("manifests", file_name(args, m)), dump_yaml(m))
+
+
+def kind_suffixed_file_name(args: BundleConfig, m: dict) -> str:
+    kind = m["kind"].lower()
+    name = m["metadata"]["name"]
+    # Some objects contain the kind in their name already while others (looking at you webhook service) do not.
+    # To avoid conflicting file names we append the kind if it's not already part of the object name.
+    if kind not in name:
+        name = f"{name}-{kind}"
+    return f"{name}.yaml"
+
+
+# File names of the objects written as separate files by kind.
+MANIFEST_FILE_NAMES = {
+    "ClusterServiceVersion": lambda args, m: (
+        f"stackable-{args.op_name}.v{args.release}.clusterserviceversion.yaml"
+    ),
+    "CustomResourceDefinition": lambda args, m: (
+        f"{m['metadata']['name']}.customresourcedefinition.yaml"
+    ),
+    "ClusterRole": kind_suffixed_file_name,
+    "ConfigMap": kind_suffixed_file_name,
+    "Service": kind_suffixed_file_name,
+}
 
-    except FileExistsError:
-        raise ManifestException("Destintation directory already exists")
 
+@traced("generate_csv")
 def generate_csv(
-    args: argparse.Namespace,
+    args: BundleConfig,
     cluster_permissions: list[tuple[str, dict]],
     deployments: list[dict],
     related_images: list[dict[str, str]],
@@ -406,71 +1155,55 @@ def generate_csv(
     return result
 
 
-def generate_helm_templates(args: argparse.Namespace) -> list[dict]:
-    logging.debug(f"start generate_helm_templates for {args.repo_operator}")
+def helm_chart_paths(
+    args: BundleConfig,
+) -> tuple[pathlib.Path, pathlib.Path, pathlib.Path]:
+    """Return the chart directory, its values.yaml and the custom values for OLM."""
     template_path = args.repo_operator / "deploy" / "helm" / args.repo_operator.name
-    # Path to the default values.yaml used in the operator Helm charts.
-    helm_values_path = template_path / "values.yaml"
-    # Path to the custom values for OLM.
-    olm_values_path = pathlib.Path(__file__).parent / "resources" / "values" / args.repo_operator.name / "values.yaml"
+    olm_values_path = RESOURCES_DIR / "values" / args.repo_operator.name / "values.yaml"
+    return template_path, template_path / "values.yaml", olm_values_path
+
+
+@traced("generate_helm_templates")
+def generate_helm_templates(args: BundleConfig) -> Iterator[dict]:
+    """Yield the patched Helm manifests one by one as they are parsed from the helm output."""
+    import subprocess
+
+    logging.debug(f"start generate_helm_templates for {args.repo_operator}")
+    template_path, helm_values_path, olm_values_path = helm_chart_paths(args)
     helm_template_cmd = ["helm", "template", args.op_name,
                          "--values", helm_values_path,
                          "--values", olm_values_path,
                          template_path]
     try:
         logging.debug("start generate_helm_templates")
-        logging.info(f"Running {helm_template_cmd}")
-        completed_proc = subprocess.run(
-            helm_template_cmd,
-            capture_output=True,
-            check=True,
-        )
-        manifests = list(
-            filter(
-                lambda x: x,  # filter out empty objects
-                yaml.load_all(
-                    completed_proc.stdout.decode("utf-8"), Loader=yaml.SafeLoader
-                ),
+        cache_key = None
+        manifests = None
+        # One table per render, so it is freed together with the manifests
+        # (e.g. when --watch renders the chart again).
+        compactor = ManifestCompactor() if args.compact_manifests else None
+        if args.render_cache:
+            cache_key = render_cache_key(
+                args, template_path, [helm_values_path, olm_values_path]
             )
-        )
-        for man in manifests:
-            try:
-                del man["metadata"]["labels"]["app.kubernetes.io/managed-by"]
-                del man["metadata"]["labels"]["helm.sh/chart"]
-            except KeyError:
-                pass
-
-            ### Patch the product cluster role with the SCC rule
-            if (
-                man["kind"] == "ClusterRole"
-                and man["metadata"]["name"] == f"{args.product}-clusterrole"
-            ):
-                man["rules"].append(
-                    {
-                        "apiGroups": ["security.openshift.io"],
-                        "resources": ["securitycontextconstraints"],
-                        "resourceNames": ["nonroot-v2"],
-                        "verbs": ["use"],
-                    }
+            manifests = load_render_cache(args.render_cache, cache_key)
+            if args.render_cache_status:
+                print(
+                    f"{args.op_name}: helm render cache {'miss' if manifests is None else 'hit'} ({cache_key[:12]})"
                 )
-            ### Patch the version label
-            try:
-                if (
-                    crv := man["metadata"]["labels"]["app.kubernetes.io/version"]
-                ) != args.release:
-                    logging.warning(
-                        f"Version mismatch for '{man['metadata']['name']}'. Replacing '{crv}' with '{args.release}'"
-                    )
-                    man["metadata"]["labels"]["app.kubernetes.io/version"] = (
-                        args.release
-                    )
-            except KeyError:
-                pass
+        if manifests is None:
+            manifests = helm_template(helm_template_cmd)
+            if cache_key:
+                manifests = store_render_cache(args.render_cache, cache_key, manifests)
+        for man in manifests:
+            for transform in HELM_TRANSFORMS:
+                transform(args, man)
+            if compactor:
+                man = compactor.compact(man)
+            yield man
 
         logging.debug("finish generate_helm_templates")
 
-        return manifests
-
     except subprocess.CalledProcessError as e:
         logging.error(e.stderr.decode("utf-8"))
         raise ManifestException(
@@ -483,55 +1216,474 @@ def generate_helm_templates(args: argparse.Namespace) -> list[dict]:
         )
 
 
-def quay_image(images: list[tuple[str, str]]) -> list[dict[str, str]]:
-    """Get the images for the operator from quay.io. See: https://docs.quay.io/api/swagger"""
-    logging.debug("start op_image")
-    result = []
-    for image, release in images:
-        release_tag = urllib.parse.urlencode({"specificTag": release})
-        tag_url = (
-            f"https://quay.io/api/v1/repository/stackable/{image}/tag?{release_tag}"
+def strip_helm_labels(args: BundleConfig, man: dict) -> None:
+    try:
+        del man["metadata"]["labels"]["app.kubernetes.io/managed-by"]
+        del man["metadata"]["labels"]["helm.sh/chart"]
+    except KeyError:
+        pass
+
+
+def add_scc_rule(args: BundleConfig, man: dict) -> None:
+    """Patch the product cluster role with the SCC rule."""
+    if (
+        man["kind"] == "ClusterRole"
+        and man["metadata"]["name"] == f"{args.product}-clusterrole"
+    ):
+        man["rules"].append(
+            {
+                "apiGroups": ["security.openshift.io"],
+                "resources": ["securitycontextconstraints"],
+                "resourceNames": ["nonroot-v2"],
+                "verbs": ["use"],
+            }
         )
-        logging.debug(f"Fetching image manifest from {tag_url}")
-        with urllib.request.urlopen(tag_url) as response:
-            data = json.load(response)
-            if not data["tags"]:
-                raise ManifestException(
-                    f"Could not find manifest digest for release '{release}' on quay.io. Pass '--use-helm-images' to use oci.stackable.tech instead."
-                )
 
-            manifest_digest = [
-                t["manifest_digest"]
-                for t in data["tags"]
-                if t["name"] == release and t["is_manifest_list"] == True
-            ]
 
-            if len(manifest_digest) == 0:
-                raise ManifestException(f"No manifest list for {image}:{release} found")
+def patch_version_label(args: BundleConfig, man: dict) -> None:
+    try:
+        if (
+            crv := man["metadata"]["labels"]["app.kubernetes.io/version"]
+        ) != args.release:
+            logging.warning(
+                f"Version mismatch for '{man['metadata']['name']}'. Replacing '{crv}' with '{args.release}'"
+            )
+            man["metadata"]["labels"]["app.kubernetes.io/version"] = args.release
+    except KeyError:
+        pass
+
 
-            if len(manifest_digest) > 1:
-                raise ManifestException(
-                    f"Multiple manifest lists for {image}:{release} found but only one expected"
-                )
+def set_version_label(man: dict, release: str) -> None:
+    """Move an already patched manifest to another release without a warning."""
+    labels = man.get("metadata", {}).get("labels", {})
+    if "app.kubernetes.io/version" in labels:
+        labels["app.kubernetes.io/version"] = release
+
+
+# Patches applied in order to every Helm manifest as it is parsed.
+HELM_TRANSFORMS = [strip_helm_labels, add_scc_rule, patch_version_label]
+
+
+def helm_template(helm_template_cmd: list) -> Iterator[dict]:
+    """Run 'helm template' and yield the documents while helm is still writing them.
+
+    Raises CalledProcessError if helm fails.
+    """
+    import subprocess
+    import tempfile
+
+    logging.info(f"Running {helm_template_cmd}")
+    with tempfile.TemporaryFile() as stderr, subprocess.Popen(
+        helm_template_cmd, stdout=subprocess.PIPE, stderr=stderr
+    ) as proc:
+        try:
+            for doc in yaml.load_all(proc.stdout, Loader=YamlLoader):
+                # filter out empty objects
+                if doc:
+                    yield doc
+        except BaseException:
+            # Also stops helm if the consumer closes the generator early.
+            proc.kill()
+            raise
+        if proc.wait() != 0:
+            stderr.seek(0)
+            raise subprocess.CalledProcessError(
+                proc.returncode, helm_template_cmd, stderr=stderr.read()
+            )
+
+
+def render_cache_key(
+    args: BundleConfig,
+    template_path: pathlib.Path,
+    values_paths: list[pathlib.Path],
+) -> str:
+    """Compute the render cache key from the chart tree, the values files and the helm version."""
+    h = hashlib.sha256()
+    h.update(helm_version())
+    h.update(args.op_name.encode())
+    for path in sorted(p for p in template_path.rglob("*") if p.is_file()):
+        h.update(str(path.relative_to(template_path)).encode())
+        h.update(hashlib.sha256(path.read_bytes()).digest())
+    for path in values_paths:
+        h.update(hashlib.sha256(path.read_bytes()).digest() if path.exists() else b"-")
+    return h.hexdigest()
+
+
+@functools.cache
+def helm_version() -> bytes:
+    """Return the output of `helm version --short`. Helm is run only once per process."""
+    import subprocess
 
-            result.append(
-                {
-                    "name": image,
-                    "image": f"quay.io/stackable/{image}@{manifest_digest[0]}",
-                }
+    try:
+        return subprocess.run(
+            ["helm", "version", "--short"], capture_output=True, check=True
+        ).stdout
+    except (OSError, subprocess.CalledProcessError) as e:
+        raise ManifestException(f"Failed to determine the helm version: {e}")
+
+
+def load_render_cache(cache_dir: pathlib.Path, key: str) -> Iterator[dict] | None:
+    """Return the cached parsed Helm manifests for the key or None on a cache miss."""
+    cache_file = cache_dir / f"{key}.pickle"
+    try:
+        # Mark the entry as recently used for the eviction.
+        os.utime(cache_file)
+    except FileNotFoundError:
+        # Missing or evicted by a concurrent run.
+        logging.debug(f"Helm render cache miss for {key}")
+        return None
+    logging.info(f"Using cached helm templates {cache_file}")
+    return read_render_cache(cache_file)
+
+
+def read_render_cache(cache_file: pathlib.Path) -> Iterator[dict]:
+    import pickle
+
+    try:
+        with cache_file.open("rb") as f:
+            while True:
+                try:
+                    yield pickle.load(f)
+                except EOFError:
+                    break
+    except (OSError, pickle.UnpicklingError) as e:
+        cache_file.unlink(missing_ok=True)
+        raise ManifestException(
+            f"Broken helm render cache entry {cache_file} has been removed. Please run again: {e}"
+        )
+
+
+def store_render_cache(
+    cache_dir: pathlib.Path,
+    key: str,
+    manifests: Iterable[dict],
+    max_entries: int = RENDER_CACHE_MAX_ENTRIES,
+) -> Iterator[dict]:
+    """Pass the parsed Helm manifests through while storing them in the cache.
+
+    The documents are pickled one after another into a temporary file, which
+    replaces the cache entry once all documents have been stored. This way
+    concurrent runs never see partial entries. Finally the least recently used
+    entries are evicted.
+    """
+    import pickle
+    import tempfile
+
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = tempfile.NamedTemporaryFile(dir=cache_dir, suffix=".tmp", delete=False)
+    except OSError as e:
+        logging.warning(f"Failed to write helm render cache entry for {key}: {e}")
+        yield from manifests
+        return
+
+    try:
+        with tmp:
+            for m in manifests:
+                pickle.dump(m, tmp, protocol=pickle.HIGHEST_PROTOCOL)
+                yield m
+        os.replace(tmp.name, cache_dir / f"{key}.pickle")
+    finally:
+        pathlib.Path(tmp.name).unlink(missing_ok=True)
+
+    try:
+        entries = sorted(
+            cache_dir.glob("*.pickle"), key=lambda p: p.stat().st_mtime, reverse=True
+        )
+        for entry in entries[max_entries:]:
+            logging.debug(f"Evicting helm render cache entry {entry}")
+            entry.unlink(missing_ok=True)
+    except OSError as e:
+        logging.warning(f"Failed to evict helm render cache entries: {e}")
+
+
+@traced("registry_digests")
+def registry_digests(
+    images: list[tuple[str, str, str]],
+    max_workers: int = QUAY_MAX_WORKERS,
+    retries: int = QUAY_RETRIES,
+    cache: "DigestCache | None" = None,
+    offline: bool = False,
+    refresh: bool = False,
+) -> list[str]:
+    """Resolve (registry URL, repository, tag) triples to manifest list digests.
+
+    Uses the OCI distribution API (https://github.com/opencontainers/distribution-spec),
+    so any registry works: a single HEAD request per image returns the digest in the
+    'Docker-Content-Digest' header. Anonymous pull tokens are requested when the
+    registry asks for them and reused for all images of the same repository.
+
+    The images are resolved concurrently by a bounded pool of workers. Each worker
+    keeps one persistent connection per registry. The result has the same order as
+    the input.
+
+    Digests found in the cache are not fetched again unless `refresh` is set.
+    With `offline` the digests are served from the cache only, even if they have expired.
+    """
+    import concurrent.futures
+    import http.client
+    import urllib.parse
+
+    logging.debug("start registry_digests")
+
+    def cache_key(image: tuple[str, str, str]) -> tuple[str, str, str]:
+        registry_url, repository, tag = image
+        return urllib.parse.urlsplit(registry_url).netloc, repository, tag
+
+    digests = {}
+    if cache and not refresh:
+        for image in images:
+            digest = cache.get(*cache_key(image), ignore_ttl=offline)
+            if digest:
+                digests[image] = digest
+    missing = [i for i in dict.fromkeys(images) if i not in digests]
+    if missing and offline:
+        raise ManifestException(
+            f"No cached digest for {', '.join(f'{r}:{t}' for _, r, t in missing)} in offline mode"
+        )
+
+    local = threading.local()
+    connections = []
+    connections_lock = threading.Lock()
+    tokens = {}
+
+    def connection(registry_url: str) -> http.client.HTTPConnection:
+        if not hasattr(local, "conns"):
+            local.conns = {}
+        if registry_url not in local.conns:
+            local.conns[registry_url] = registry_connection(registry_url)
+            with connections_lock:
+                connections.append(local.conns[registry_url])
+        return local.conns[registry_url]
+
+    def resolve(image: tuple[str, str, str]) -> str:
+        registry_url, repository, tag = image
+        path = f"/v2/{repository}/manifests/{tag}"
+        headers = {"Accept": MANIFEST_ACCEPT}
+        if token := tokens.get((registry_url, repository)):
+            headers["Authorization"] = f"Bearer {token}"
+        conn = connection(registry_url)
+        response = registry_request(conn, "HEAD", path, headers, retries)
+        if response.status == 401:
+            token = anonymous_token(
+                response.getheader("WWW-Authenticate", ""), repository, retries
             )
-    logging.debug("finish op_image")
+            tokens[(registry_url, repository)] = token
+            headers["Authorization"] = f"Bearer {token}"
+            response = registry_request(conn, "HEAD", path, headers, retries)
+
+        if response.status == 404:
+            raise ImageNotFoundException(
+                f"Could not find {repository}:{tag} on {conn.host}"
+            )
+        if response.status != 200:
+            raise ManifestException(
+                f"Failed to fetch {path} from {conn.host}: HTTP {response.status} {response.reason}"
+            )
+        media_type = response.getheader("Content-Type", "").split(";")[0].strip()
+        if media_type not in MANIFEST_LIST_TYPES:
+            raise ManifestException(
+                f"No manifest list for {repository}:{tag} found (got {media_type or 'no media type'})"
+            )
+        digest = response.getheader("Docker-Content-Digest")
+        if not digest:
+            raise ManifestException(
+                f"{conn.host} did not return a digest for {repository}:{tag}"
+            )
+        return digest
+
+    if missing:
+        try:
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=min(max_workers, len(missing))
+            ) as pool:
+                digests.update(zip(missing, pool.map(resolve, missing)))
+        finally:
+            for conn in connections:
+                conn.close()
+        if cache:
+            for registry, entries in group_by_registry(
+                [(*cache_key(i), digests[i]) for i in missing]
+            ).items():
+                cache.put(registry, entries)
+
+    logging.debug("finish registry_digests")
+    return [digests[image] for image in images]
+
+
+def group_by_registry(
+    entries: list[tuple[str, str, str, str]],
+) -> dict[str, list[tuple[str, str, str]]]:
+    result = {}
+    for registry, *entry in entries:
+        result.setdefault(registry, []).append(tuple(entry))
     return result
 
 
-def write_metadata(args: argparse.Namespace) -> None:
-    logging.debug("start write_metadata")
+class DigestCache:
+    """Persistent cache of manifest digests keyed by (registry, repository, tag).
+
+    The entries are stored in a SQLite database so that it can be shared by
+    concurrent runs. Entries older than `ttl` seconds are ignored and the cache
+    is trimmed to the `max_entries` most recently fetched entries on every write.
+    """
+
+    def __init__(
+        self,
+        path: pathlib.Path,
+        ttl: float,
+        max_entries: int = DIGEST_CACHE_MAX_ENTRIES,
+    ):
+        import sqlite3
+
+        self.ttl = ttl
+        self.max_entries = max_entries
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self.db = sqlite3.connect(path, timeout=30)
+            with self.db:
+                self.db.execute(
+                    "CREATE TABLE IF NOT EXISTS digests ("
+                    " registry TEXT, repository TEXT, tag TEXT,"
+                    " digest TEXT NOT NULL, fetched REAL NOT NULL,"
+                    " PRIMARY KEY (registry, repository, tag))"
+                )
+                self.db.execute(
+                    "CREATE INDEX IF NOT EXISTS digests_fetched ON digests (fetched)"
+                )
+        except (OSError, sqlite3.Error) as e:
+            raise ManifestException(f"Failed to open digest cache '{path}': {e}")
+
+    def get(
+        self, registry: str, repository: str, tag: str, ignore_ttl: bool = False
+    ) -> str | None:
+        row = self.db.execute(
+            "SELECT digest, fetched FROM digests WHERE registry = ? AND repository = ? AND tag = ?",
+            (registry, repository, tag),
+        ).fetchone()
+        if not row:
+            return None
+        digest, fetched = row
+        if time.time() - fetched > self.ttl:
+            if not ignore_ttl:
+                return None
+            logging.warning(f"Using expired digest for {repository}:{tag}")
+        logging.debug(f"Using cached digest for {registry}/{repository}:{tag}")
+        return digest
+
+    def put(self, registry: str, entries: list[tuple[str, str, str]]) -> None:
+        now = time.time()
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?)",
+                [(registry, repo, tag, digest, now) for repo, tag, digest in entries],
+            )
+            self.db.execute(
+                "DELETE FROM digests WHERE rowid NOT IN"
+                " (SELECT rowid FROM digests ORDER BY fetched DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+    def close(self) -> None:
+        self.db.close()
+
+
+def registry_connection(registry_url: str) -> "http.client.HTTPConnection":
+    import http.client
+    import urllib.parse
+
+    url = urllib.parse.urlsplit(registry_url)
+    if url.scheme == "http":
+        return http.client.HTTPConnection(url.netloc, timeout=QUAY_TIMEOUT)
+    return http.client.HTTPSConnection(url.netloc, timeout=QUAY_TIMEOUT)
+
+
+@traced("registry_request")
+def registry_request(
+    conn: "http.client.HTTPConnection",
+    method: str,
+    path: str,
+    headers: dict[str, str],
+    retries: int,
+) -> "http.client.HTTPResponse":
+    """Send a request to a registry over a persistent connection and read the response.
+
+    Connection errors, 429 and 5xx responses are retried with exponential backoff
+    and full jitter. A 'Retry-After' header from the server takes precedence.
+    The body of the returned response has already been read and is available as `body`.
+    """
+    import http.client
+    import random
 
+    for attempt in range(retries + 1):
+        delay = random.uniform(0, QUAY_BACKOFF_BASE * 2**attempt)
+        logging.debug(f"{method} {conn.host}{path}")
+        try:
+            conn.request(method, path, headers=headers)
+            response = conn.getresponse()
+            response.body = response.read()
+        except (OSError, http.client.HTTPException) as e:
+            # The server may have dropped the idle connection. Reconnect on the next attempt.
+            conn.close()
+            if attempt == retries:
+                raise ManifestException(f"Failed to fetch {path} from {conn.host}: {e}")
+            logging.warning(
+                f"Request to {conn.host} failed ({e}). Retrying in {delay:.1f}s"
+            )
+            time.sleep(delay)
+            continue
+
+        if (response.status == 429 or response.status >= 500) and attempt < retries:
+            retry_after = response.getheader("Retry-After", "")
+            if retry_after.isdigit():
+                delay = float(retry_after)
+            logging.warning(
+                f"{conn.host} returned HTTP {response.status} for {path}. Retrying in {delay:.1f}s"
+            )
+            time.sleep(delay)
+            continue
+        return response
+
+
+def anonymous_token(challenge: str, repository: str, retries: int) -> str:
+    """Request an anonymous pull token as described by a 'WWW-Authenticate: Bearer ...' challenge.
+
+    See: https://distribution.github.io/distribution/spec/auth/token/
+    """
+    import json
+    import urllib.parse
+
+    scheme, _, params = challenge.partition(" ")
+    params = dict(AUTH_PARAM.findall(params))
+    if scheme.lower() != "bearer" or "realm" not in params:
+        raise ManifestException(f"Unsupported registry authentication: '{challenge}'")
+
+    realm = urllib.parse.urlsplit(params["realm"])
+    query = {"scope": params.get("scope", f"repository:{repository}:pull")}
+    if "service" in params:
+        query["service"] = params["service"]
+    path = f"{realm.path}?{'&'.join(filter(None, [realm.query, urllib.parse.urlencode(query)]))}"
+
+    conn = registry_connection(f"{realm.scheme}://{realm.netloc}")
     try:
-        metadata_dir = args.dest_dir / "metadata"
-        logging.info(f"Creating directory {metadata_dir}")
-        os.makedirs(metadata_dir)
+        response = registry_request(
+            conn, "GET", path, {"Accept": "application/json"}, retries
+        )
+    finally:
+        conn.close()
+    if response.status != 200:
+        raise ManifestException(
+            f"Failed to get a token from {params['realm']}: HTTP {response.status} {response.reason}"
+        )
+    data = json.loads(response.body)
+    return data.get("token") or data["access_token"]
 
+
+@traced("write_metadata")
+def write_metadata(args: BundleConfig, writer: "BundleWriter | Bundle") -> None:
+    logging.debug("start write_metadata")
+
+    try:
         annos = load_resource("annotations.yaml")
 
         bundle_package_name = (
@@ -550,28 +1702,655 @@ def write_metadata(args: argparse.Namespace) -> None:
             f"stable,{args.channel}"
         )
 
-        anno_file = metadata_dir / "annotations.yaml"
-        logging.info(f"Writing {anno_file}")
-        anno_file.write_text(yaml.dump(annos))
+        writer.write(pathlib.Path("metadata", "annotations.yaml"), dump_yaml(annos))
     except yaml.YAMLError:
         raise ManifestException("Failed to load annotations template")
 
     logging.debug("finish write_metadata")
 
 
+def exchange_paths(a: pathlib.Path, b: pathlib.Path) -> bool:
+    """Atomically swap two paths with renameat2(RENAME_EXCHANGE).
+
+    Returns False if the system call is not available, e.g. not on Linux, with
+    a C library older than glibc 2.28 or on a file system without support.
+    """
+    import ctypes
+
+    try:
+        renameat2 = ctypes.CDLL(None, use_errno=True).renameat2
+    except AttributeError:
+        return False
+    result = renameat2(
+        AT_FDCWD, os.fsencode(a), AT_FDCWD, os.fsencode(b), RENAME_EXCHANGE
+    )
+    if result == 0:
+        return True
+    error = ctypes.get_errno()
+    if error in (errno.ENOSYS, errno.EINVAL, errno.ENOTSUP):
+        return False
+    raise OSError(error, f"Failed to exchange {a} and {b}: {os.strerror(error)}")
+
+
+class BundleWriter:
+    """Write the files of a bundle and replace the existing bundle if anything changed.
+
+    Files are compared with the existing bundle by content hash. Only new and
+    changed files are written to a staging directory next to the destination.
+    On commit, unchanged files are hard linked into the staging directory, so
+    they keep their mtime, and the staging directory is swapped with the
+    destination. Nothing is written at all if the bundle is up to date.
+
+    The swap is atomic where renameat2(RENAME_EXCHANGE) is available (Linux).
+    Elsewhere the destination is first renamed to a backup directory and the
+    staging directory is renamed to the destination. If the process dies in
+    between, the next run restores the backup.
+
+    In check mode, nothing is written and the differences are only reported.
+    """
+
+    def __init__(self, dest_dir: pathlib.Path, check: bool = False):
+        self.dest_dir = dest_dir
+        self.staging_dir = dest_dir.with_name(f".{dest_dir.name}.tmp")
+        self.old_dir = dest_dir.with_name(f".{dest_dir.name}.old")
+        self.check = check
+        # Relative path -> whether the content differs from the existing bundle
+        self.files: dict[pathlib.Path, bool] = {}
+        if not check:
+            # Left over from an interrupted run
+            if self.old_dir.exists() and not self.dest_dir.exists():
+                logging.warning(f"Restoring {self.dest_dir} from {self.old_dir}")
+                self.old_dir.rename(self.dest_dir)
+            for d in (self.staging_dir, self.old_dir):
+                if d.exists():
+                    shutil.rmtree(d)
+
+    def write(self, rel_path: pathlib.Path, content: str) -> None:
+        if rel_path in self.files:
+            raise ManifestException(
+                f"Manifest file '{self.dest_dir / rel_path}' already exists"
+            )
+        data = content.encode("utf-8")
+        existing = self.dest_dir / rel_path
+        changed = not (
+            existing.is_file()
+            and existing.stat().st_size == len(data)
+            and hashlib.sha256(existing.read_bytes()).digest()
+            == hashlib.sha256(data).digest()
+        )
+        self.files[rel_path] = changed
+
+        if not changed:
+            logging.debug(f"Unchanged {existing}")
+        elif self.check:
+            import difflib
+
+            old = existing.read_text().splitlines(True) if existing.is_file() else []
+            sys.stdout.writelines(
+                difflib.unified_diff(
+                    old,
+                    content.splitlines(True),
+                    fromfile=str(existing) if old else "/dev/null",
+                    tofile=str(existing),
+                )
+            )
+        else:
+            logging.info(f"Writing {existing}")
+            staging_file = self.staging_dir / rel_path
+            staging_file.parent.mkdir(parents=True, exist_ok=True)
+            staging_file.write_bytes(data)
+
+    def changes(self) -> list[str]:
+        """List the added (+), changed (~) and removed (-) files."""
+        existing = (
+            {
+                p.relative_to(self.dest_dir)
+                for p in self.dest_dir.rglob("*")
+                if p.is_file()
+            }
+            if self.dest_dir.exists()
+            else set()
+        )
+        return sorted(
+            [
+                f"{'~' if path in existing else '+'} {path}"
+                for path, changed in self.files.items()
+                if changed
+            ]
+            + [f"- {path}" for path in existing - self.files.keys()],
+            key=lambda c: c[2:],
+        )
+
+    def commit(self) -> list[str]:
+        """Replace the existing bundle (unless in check mode) and return the changes."""
+        changes = self.changes()
+        if self.check:
+            for change in changes:
+                print(f"{change[0]} {self.dest_dir / change[2:]}")
+        if not changes:
+            logging.info(f"Bundle {self.dest_dir} is up to date")
+        if self.check or not changes:
+            return changes
+
+        for path, changed in self.files.items():
+            if not changed:
+                staging_file = self.staging_dir / path
+                staging_file.parent.mkdir(parents=True, exist_ok=True)
+                try:
+                    os.link(self.dest_dir / path, staging_file)
+                except OSError:
+                    shutil.copy2(self.dest_dir / path, staging_file)
+
+        logging.info(f"Replacing directory {self.dest_dir}")
+        if self.dest_dir.exists() and exchange_paths(self.staging_dir, self.dest_dir):
+            # The staging directory now holds the previous bundle.
+            shutil.rmtree(self.staging_dir, ignore_errors=True)
+            return changes
+        if self.dest_dir.exists():
+            self.dest_dir.rename(self.old_dir)
+        self.staging_dir.rename(self.dest_dir)
+        shutil.rmtree(self.old_dir, ignore_errors=True)
+        return changes
+
+    def cleanup(self) -> None:
+        if not self.check and self.staging_dir.exists():
+            shutil.rmtree(self.staging_dir)
+
+
+class Bundle:
+    """The files of an OLM bundle held in memory.
+
+    Has the same `write` method as `BundleWriter`, so the bundle can be built
+    without touching the file system and saved later.
+    """
+
+    def __init__(self, dest_dir: pathlib.Path):
+        self.dest_dir = dest_dir
+        # Relative path -> content
+        self.files: dict[pathlib.Path, str] = {}
+
+    def write(self, rel_path: pathlib.Path, content: str) -> None:
+        if rel_path in self.files:
+            raise ManifestException(
+                f"Manifest file '{self.dest_dir / rel_path}' already exists"
+            )
+        self.files[rel_path] = content
+
+    def save(self, check: bool = False) -> list[str]:
+        """Write the bundle to `dest_dir`. Returns the list of changed files."""
+        writer = BundleWriter(self.dest_dir, check=check)
+        try:
+            for rel_path, content in self.files.items():
+                writer.write(rel_path, content)
+            return writer.commit()
+        finally:
+            writer.cleanup()
+
+
+class BundleBuilder:
+    """Build OLM bundles in the current process.
+
+    The resource templates are parsed once and shared by all bundles built in
+    the same process, so many bundles can be generated by one warm interpreter:
+
+        builder = BundleBuilder()
+        bundle = builder.build(
+            BundleConfig(
+                release="26.3.0",
+                repo_operator=pathlib.Path("airflow-operator"),
+                repo_certified_operators=pathlib.Path("openshift-certified-operators"),
+                openshift_versions="v4.18-v4.21",
+            )
+        )
+        csv = bundle.files[pathlib.Path("manifests", "...clusterserviceversion.yaml")]
+    """
+
+    RESOURCES = ["csv.yaml", "annotations.yaml"]
+
+    def __init__(self):
+        for file_name in self.RESOURCES:
+            parse_resource(file_name)
+
+    def build(self, config: BundleConfig) -> Bundle:
+        """Render the Helm chart and return the complete bundle in memory."""
+        config.validate(writing=False)
+        bundle = Bundle(config.dest_dir)
+        self.write(config, bundle)
+        return bundle
+
+    def save(self, config: BundleConfig) -> list[str]:
+        """Render the Helm chart and write the bundle to the certification repository.
+
+        The manifests are written while the Helm output is still being parsed.
+        Returns the list of changed files (see `BundleWriter.changes()`).
+        """
+        config.validate()
+        if config.preflight:
+            # The bundle must be complete before it can be validated
+            bundle = Bundle(config.dest_dir)
+            self.write(config, bundle)
+            preflight_bundle(config, bundle)
+            return bundle.save(config.check)
+
+        writer = BundleWriter(config.dest_dir, check=config.check)
+        try:
+            self.write(config, writer)
+            return writer.commit()
+        finally:
+            writer.cleanup()
+
+    def save_variants(
+        self, configs: list[BundleConfig], rendered: list[dict] | None = None
+    ) -> list[str]:
+        """Write several variants of the bundle of one operator.
+
+        The variants may differ in release, quay release, channel, OpenShift
+        versions and output directory. The Helm chart is rendered once. The
+        manifests and the CSV are generated once per (release, quay release)
+        and only metadata/annotations.yaml is generated for every variant.
+        The variants are written in parallel.
+
+        Pass the output of generate_helm_templates() for the first variant as
+        `rendered` to reuse an earlier render. It is not modified.
+
+        Returns the changed files of all variants prefixed with their directory.
+        """
+        if len(configs) == 1 and rendered is None:
+            return self.save(configs[0])
+
+        dest_dirs = [config.dest_dir for config in configs]
+        if len(set(dest_dirs)) != len(dest_dirs):
+            raise ManifestException(
+                "Bundle variants must be written to different directories. Use a different release or output=DIR."
+            )
+        for config in configs:
+            config.validate()
+
+        releases = list(dict.fromkeys((c.release, c.quay_release) for c in configs))
+        bundles = []
+        with TRACER.span(
+            "build_variants", operator=configs[0].op_name, variants=len(configs)
+        ):
+            # generate_manifests patches the images in place, so the render is
+            # copied unless it is used only once.
+            copy_render = rendered is not None or len(releases) > 1
+            if rendered is None:
+                rendered = list(generate_helm_templates(configs[0]))
+            manifest_files: dict[tuple[str, str], dict[pathlib.Path, str]] = {}
+            for config in configs:
+                release = (config.release, config.quay_release)
+                if release not in manifest_files:
+                    helm_manifests = (
+                        copy.deepcopy(rendered) if copy_render else rendered
+                    )
+                    if config.release != configs[0].release:
+                        for m in helm_manifests:
+                            set_version_label(m, config.release)
+                    shared = Bundle(config.dest_dir)
+                    write_manifests(
+                        config, generate_manifests(config, helm_manifests), shared
+                    )
+                    manifest_files[release] = shared.files
+                bundle = Bundle(config.dest_dir)
+                bundle.files = dict(manifest_files[release])
+                write_metadata(config, bundle)
+                if config.preflight:
+                    preflight_bundle(config, bundle)
+                bundles.append(bundle)
+
+        import concurrent.futures
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(bundles)) as pool:
+            changes = pool.map(lambda b, config: b.save(config.check), bundles, configs)
+            return [
+                f"{change[:2]}{bundle.dest_dir / change[2:]}"
+                for bundle, bundle_changes in zip(bundles, changes)
+                for change in bundle_changes
+            ]
+
+    def write(self, config: BundleConfig, writer: "BundleWriter | Bundle") -> None:
+        with TRACER.span("build_bundle", operator=config.op_name):
+            write_manifests(config, generate_manifests(config), writer)
+            write_metadata(config, writer)
+
+
+@functools.cache
+def load_validator():
+    """Import olm/validate-bundles.py (its file name is not a valid module name)."""
+    path = pathlib.Path(__file__).parent / "validate-bundles.py"
+    spec = importlib.util.spec_from_file_location("validate_bundles", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@traced("preflight")
+def preflight_bundle(args: BundleConfig, bundle: Bundle) -> None:
+    """Raise if the bundle would not pass the checks of validate-bundles.py."""
+    errors = load_validator().validate_bundle(
+        bundle.files,
+        release=args.release,
+        allow_tags=args.use_helm_images and not args.pin_helm_images,
+    )
+    if errors:
+        raise ManifestException(
+            f"Bundle {bundle.dest_dir} is invalid:\n  " + "\n  ".join(errors)
+        )
+
+
+def bundle_configs(
+    args: argparse.Namespace, repo_operator: pathlib.Path
+) -> list[BundleConfig]:
+    """Return the options for every requested variant of the bundle of one operator.
+
+    The first variant is given by the command line args, every --variant
+    overrides some of them.
+    """
+    return [
+        BundleConfig.from_args(args, repo_operator),
+        *(
+            BundleConfig.from_args(
+                argparse.Namespace(**{**vars(args), **variant}), repo_operator
+            )
+            for variant in args.variant
+        ),
+    ]
+
+
+def build_bundle_isolated(
+    args: argparse.Namespace, repo_operator: pathlib.Path
+) -> tuple[str, float, str | None, list[str], list[dict]]:
+    """Build the bundle for one operator and report the outcome instead of raising.
+
+    Runs in a worker process. Returns the operator name, the elapsed time in
+    seconds, an error message (None on success), the list of changed files and
+    the trace events recorded while building the bundle.
+    """
+    TRACER.enabled = tracing_enabled(args)
+    TRACER.events = []
+    start = time.monotonic()
+    changes = []
+    try:
+        changes = BundleBuilder().save_variants(bundle_configs(args, repo_operator))
+        error = None
+    except Exception as e:
+        logging.error(f"Failed to build bundle for {repo_operator.name}: {e}")
+        error = str(e) or e.__class__.__name__
+    return repo_operator.name, time.monotonic() - start, error, changes, TRACER.events
+
+
+def build_bundles(args: argparse.Namespace) -> int:
+    """Build the bundles of all requested operators on a bounded process pool.
+
+    A failure of one operator does not affect the others. A summary is printed
+    once all bundles have been processed.
+    """
+    import concurrent.futures
+
+    results = []
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=min(args.jobs, len(args.repo_operator)),
+        initializer=configure_logging,
+        initargs=(args.log_level,),
+    ) as pool:
+        futures = [
+            pool.submit(build_bundle_isolated, args, repo_operator)
+            for repo_operator in args.repo_operator
+        ]
+        for future in concurrent.futures.as_completed(futures):
+            results.append(future.result())
+
+    failed = [r for r in results if r[2] is not None]
+    outdated = [r for r in results if r[3]] if args.check else []
+    print(f"\nBundle summary for release {args.release}:")
+    for op_name, elapsed, error, changes, _ in sorted(results):
+        if error:
+            status, detail = "FAILED", error
+        else:
+            status = "OUTDATED" if args.check and changes else "OK"
+            detail = f"{len(changes)} file(s) changed" if changes else "up to date"
+        print(f"  {op_name:<24} {status:<8} {elapsed:7.1f}s  {detail}")
+    print(f"{len(results) - len(failed)} succeeded, {len(failed)} failed")
+
+    write_trace(args, [e for r in results for e in r[4]])
+
+    return 1 if failed or outdated else 0
+
+
+class InotifyWatcher:
+    """Report the files changed below some directories using Linux inotify."""
+
+    def __init__(self, dirs: list[pathlib.Path]):
+        import ctypes
+        import struct
+
+        self.event = struct.Struct(INOTIFY_EVENT_FORMAT)
+        # The symbols of the C library are available in the process namespace.
+        libc = ctypes.CDLL(None, use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._get_errno = ctypes.get_errno
+        self.fd = libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        # watch descriptor -> directory
+        self.dirs: dict[int, pathlib.Path] = {}
+        for directory in dirs:
+            self.add(directory)
+
+    def add(self, directory: pathlib.Path) -> None:
+        """Watch the directory and all its subdirectories."""
+        for path in [directory, *(p for p in directory.rglob("*") if p.is_dir())]:
+            wd = self._add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+            if wd < 0:
+                error = self._get_errno()
+                # Removed again while scanning
+                if error == errno.ENOENT:
+                    continue
+                raise OSError(error, f"inotify_add_watch failed for {path}")
+            self.dirs[wd] = path
+
+    def wait(self, timeout: float | None) -> set[pathlib.Path]:
+        """Return the changed paths, or an empty set if nothing changed within `timeout` seconds."""
+        import select
+
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return set()
+        data = os.read(self.fd, 64 * 1024)
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = self.event.unpack_from(data, offset)
+            offset += self.event.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_IGNORED:
+                # The directory was removed
+                self.dirs.pop(wd, None)
+                continue
+            if wd not in self.dirs or not name:
+                continue
+            path = self.dirs[wd] / os.fsdecode(name)
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                self.add(path)
+            changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Report the files changed below some directories by comparing their modification times.
+
+    Used where inotify is not available.
+    """
+
+    def __init__(self, dirs: list[pathlib.Path]):
+        self.dirs = dirs
+        self.snapshot = self.scan()
+
+    def scan(self) -> dict[pathlib.Path, tuple[int, int]]:
+        files = {}
+        for directory in self.dirs:
+            for root, _, names in os.walk(directory):
+                for name in names:
+                    path = pathlib.Path(root, name)
+                    with contextlib.suppress(FileNotFoundError):
+                        st = path.stat()
+                        files[path] = (st.st_mtime_ns, st.st_size)
+        return files
+
+    def wait(self, timeout: float | None) -> set[pathlib.Path]:
+        """Return the changed paths, or an empty set if nothing changed within `timeout` seconds."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            current = self.scan()
+            changed = {
+                path
+                for path in current.keys() | self.snapshot.keys()
+                if current.get(path) != self.snapshot.get(path)
+            }
+            self.snapshot = current
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            time.sleep(WATCH_POLL_INTERVAL)
+
+    def close(self) -> None:
+        pass
+
+
+def file_watcher(dirs: list[pathlib.Path]) -> InotifyWatcher | PollingWatcher:
+    try:
+        return InotifyWatcher(dirs)
+    except (OSError, AttributeError) as e:
+        logging.warning(f"inotify is not available ({e}), polling for changes instead")
+        return PollingWatcher(dirs)
+
+
+def is_temporary_file(path: pathlib.Path) -> bool:
+    """Editors write backup and swap files next to the edited file (vim also checks with a file named 4913)."""
+    return (
+        path.name.startswith((".", "#"))
+        or path.name.endswith(("~", ".swp", ".swx"))
+        or path.name == "4913"
+    )
+
+
+def wait_for_changes(
+    watcher: InotifyWatcher | PollingWatcher,
+) -> set[pathlib.Path]:
+    """Block until files changed and no further change happened for WATCH_DEBOUNCE seconds."""
+    changed = watcher.wait(None)
+    while more := watcher.wait(WATCH_DEBOUNCE):
+        changed |= more
+    return {path for path in changed if not is_temporary_file(path)}
+
+
+def watch(args: argparse.Namespace) -> int:
+    """Build the bundle of one operator and rebuild it whenever its inputs change.
+
+    Changes of the Helm chart or the OLM values render the chart again. Changes
+    of the resource templates in olm/resources reuse the previous render. Image
+    digests come from the digest cache and only the files whose content changed
+    are written. Runs until interrupted with Ctrl-C.
+    """
+    configs = bundle_configs(args, args.repo_operator[0])
+    chart_dir, _, olm_values_path = helm_chart_paths(configs[0])
+    watcher = file_watcher([chart_dir, RESOURCES_DIR])
+    builder = BundleBuilder()
+    logging.info(
+        f"Watching {chart_dir}, {olm_values_path} and {RESOURCES_DIR}/*.yaml. Press Ctrl-C to stop."
+    )
+    rendered = None
+    try:
+        while True:
+            start = time.monotonic()
+            try:
+                if rendered is None:
+                    rendered = list(generate_helm_templates(configs[0]))
+                changes = builder.save_variants(configs, rendered)
+                logging.info(
+                    f"Bundle built in {time.monotonic() - start:.3f}s, {len(changes)} file(s) changed"
+                )
+                for change in changes:
+                    logging.info(f"  {change}")
+            except Exception as e:
+                logging.error(f"Failed to build bundle: {e}")
+            write_trace(args, TRACER.events)
+            TRACER.events = []
+
+            render = resources = False
+            while not (render or resources):
+                changed = wait_for_changes(watcher)
+                render = any(
+                    path == olm_values_path or path.is_relative_to(chart_dir)
+                    for path in changed
+                )
+                resources = any(
+                    path.parent == RESOURCES_DIR and path.suffix == ".yaml"
+                    for path in changed
+                )
+            logging.info(f"Changed: {', '.join(sorted(map(str, changed)))}")
+            if render:
+                rendered = None
+            if resources:
+                parse_resource.cache_clear()
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        watcher.close()
+
+
+def tracing_enabled(args: argparse.Namespace) -> bool:
+    return bool(args.timings or args.trace_file)
+
+
+def write_trace(args: argparse.Namespace, events: list[dict]) -> None:
+    """Print the stage timings and write the trace file as requested by the command line args."""
+    if args.trace_file:
+        import json
+
+        args.trace_file.write_text(
+            json.dumps({"traceEvents": events, "displayTimeUnit": "ms"})
+        )
+    if not args.timings:
+        return
+
+    totals = {}
+    for e in events:
+        spans, total, longest = totals.get(e["name"], (0, 0.0, 0.0))
+        totals[e["name"]] = (spans + 1, total + e["dur"], max(longest, e["dur"]))
+    print("\nStage timings (including nested stages, summed over all operators):")
+    print(f"  {'stage':<24} {'spans':>6} {'total':>9} {'max':>9}")
+    for name, (spans, total, longest) in sorted(
+        totals.items(), key=lambda t: t[1][1], reverse=True
+    ):
+        print(f"  {name:<24} {spans:>6} {total / 1e6:8.3f}s {longest / 1e6:8.3f}s")
+
+
+def configure_logging(level: int) -> None:
+    logging.basicConfig(encoding="utf-8", level=level)
+
+
 def main(argv) -> int:
     opts = parse_args(argv[1:])
-    logging.basicConfig(encoding="utf-8", level=opts.log_level)
+    configure_logging(opts.log_level)
 
-    manifests = generate_manifests(opts)
+    if len(opts.repo_operator) > 1:
+        return build_bundles(opts)
 
-    logging.info(f"Removing directory {opts.dest_dir}")
-    if opts.dest_dir.exists():
-        shutil.rmtree(opts.dest_dir)
-
-    write_manifests(opts, manifests)
-    write_metadata(opts)
-    return 0
+    TRACER.enabled = tracing_enabled(opts)
+    if opts.watch:
+        return watch(opts)
+    try:
+        changes = BundleBuilder().save_variants(
+            bundle_configs(opts, opts.repo_operator[0])
+        )
+    finally:
+        write_trace(opts, TRACER.events)
+    return 1 if opts.check and changes else 0
 
 
 CSV_DISPLAY_NAME = {
@@ -0,0 +1,391 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#   "pyyaml",
+# ]
+# ///
+"""
+Run the certification pipeline for several operators in parallel.
+
+Starts the same `tkn pipeline start operator-ci-pipeline` as
+run-certification-pipeline.sh for every operator, with at most --jobs
+pipelines at a time. The log of each pipeline is written to
+<log-dir>/<operator>.log and upstream PR URLs are reported as soon as they
+appear in the log.
+
+The status of every operator is kept in <log-dir>/state.json. When the script
+is started again (e.g. after Ctrl-C) operators that succeeded are skipped,
+pipelines that were still running are followed with `tkn pipelinerun logs`
+and all others are started again. Interrupting the script does not cancel
+pipeline runs that were already started.
+
+Usage:
+
+    ./olm/run-certification-pipelines.py --version 26.3.0 --submit false airflow hdfs druid
+
+    # All operators of the release
+    ./olm/run-certification-pipelines.py --version 26.3.0 --submit true --release-config release/config.yaml
+
+Set TKN (or pass --tkn) to use another `tkn` executable, e.g. a stub for testing.
+"""
+
+import argparse
+import concurrent.futures
+import dataclasses
+import json
+import logging
+import os
+import pathlib
+import re
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+import yaml
+
+NAMESPACE = "stackable-operators"
+GIT_REPO_URL = "https://github.com/stackabletech/openshift-certified-operators"
+GIT_USER = "StackableOpenShift"
+UPSTREAM_REPO = "redhat-openshift-ecosystem/certified-operators"
+WORKSPACE_TEMPLATE = (
+    pathlib.Path(__file__).parent / "templates" / "workspace-template.yml"
+)
+MAX_WORKERS = 4
+
+PR_URL = re.compile(r"\[open-pull-request : open-pull-request\] (https://\S+)")
+# PipelineRun started: operator-ci-pipeline-run-7xk2p
+PIPELINE_RUN = re.compile(r"PipelineRun started: (\S+)")
+
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class PipelineException(Exception):
+    pass
+
+
+@dataclasses.dataclass
+class PipelineStatus:
+    operator: str
+    status: str = PENDING
+    pipeline_run: str | None = None
+    pr_url: str | None = None
+    started: float | None = None
+    finished: float | None = None
+    error: str | None = None
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+
+class State:
+    """Status of all operators, saved to a JSON file after every change."""
+
+    def __init__(self, path: pathlib.Path, operators: list[str]):
+        self.path = path
+        self.lock = threading.Lock()
+        saved = {}
+        if path.exists():
+            saved = {
+                s["operator"]: PipelineStatus(**s)
+                for s in json.loads(path.read_text())["operators"]
+            }
+        self.operators = {op: saved.get(op, PipelineStatus(op)) for op in operators}
+
+    def update(self, operator: str, **changes) -> None:
+        with self.lock:
+            self.operators[operator] = dataclasses.replace(
+                self.operators[operator], **changes
+            )
+            self.save()
+
+    def save(self) -> None:
+        data = {"operators": [dataclasses.asdict(s) for s in self.operators.values()]}
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data, indent=2))
+        tmp.replace(self.path)
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Run the certification pipeline for several operators in parallel.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument(
+        "operators",
+        help="Operator names (e.g. opa, spark-k8s).",
+        nargs="*",
+    )
+    parser.add_argument(
+        "--release-config",
+        help="Run the pipeline for all operators listed in this release configuration (e.g. release/config.yaml).",
+        type=pathlib.Path,
+    )
+    parser.add_argument(
+        "--version", help="Release version (e.g. 26.3.0)", required=True
+    )
+    parser.add_argument(
+        "--submit",
+        help="Whether to submit the bundles for certification upstream.",
+        choices=["true", "false"],
+        required=True,
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        help=f"Maximum number of pipelines running at the same time. Default: {MAX_WORKERS}",
+        type=int,
+        default=MAX_WORKERS,
+    )
+    parser.add_argument(
+        "--log-dir",
+        help="Directory for the pipeline logs and the state file. Default: certification-<version>",
+        type=pathlib.Path,
+    )
+    parser.add_argument(
+        "--namespace",
+        help=f"Namespace of the pipeline. Default: {NAMESPACE}",
+        default=NAMESPACE,
+    )
+    parser.add_argument(
+        "--tkn",
+        help="The tkn executable. Default: $TKN or 'tkn'",
+        default=os.environ.get("TKN", "tkn"),
+    )
+    parser.add_argument(
+        "--log-level",
+        help="Set log level.",
+        type=str.upper,
+        default="INFO",
+    )
+    args = parser.parse_args(argv)
+
+    if args.release_config:
+        args.operators.extend(
+            op.removesuffix("-operator")
+            for op in yaml.safe_load(args.release_config.read_text())["operators"]
+        )
+    if not args.operators:
+        parser.error("either operator names or --release-config is required")
+    args.operators = list(dict.fromkeys(args.operators))
+    if not args.log_dir:
+        args.log_dir = pathlib.Path(f"certification-{args.version}")
+    return args
+
+
+def bundle_dir_name(operator: str) -> str:
+    # The spark-k8s operator is certified as stackable-spark-operator (see build-manifests.py).
+    return "spark" if operator == "spark-k8s" else operator
+
+
+def pipeline_start_cmd(args: argparse.Namespace, operator: str) -> list[str]:
+    name = bundle_dir_name(operator)
+    return [
+        args.tkn,
+        "pipeline",
+        "start",
+        "operator-ci-pipeline",
+        "--namespace",
+        args.namespace,
+        "--use-param-defaults",
+        "--param",
+        f"git_repo_url={GIT_REPO_URL}",
+        "--param",
+        f"git_branch=stackable-{name}-{args.version}",
+        "--param",
+        f"git_username={GIT_USER}",
+        "--param",
+        f"bundle_path=operators/stackable-{name}-operator/{args.version}",
+        "--param",
+        f"upstream_repo_name={UPSTREAM_REPO}",
+        "--param",
+        f"submit={args.submit}",
+        "--param",
+        "env=prod",
+        "--workspace",
+        f"name=pipeline,volumeClaimTemplateFile={WORKSPACE_TEMPLATE}",
+        "--showlog",
+    ]
+
+
+def pipeline_logs_cmd(args: argparse.Namespace, pipeline_run: str) -> list[str]:
+    return [
+        args.tkn,
+        "pipelinerun",
+        "logs",
+        pipeline_run,
+        "--namespace",
+        args.namespace,
+        "--follow",
+    ]
+
+
+def pipeline_run_succeeded(args: argparse.Namespace, pipeline_run: str) -> bool:
+    """Ask Tekton for the outcome; `tkn ... --showlog` exits with 0 even if the run failed."""
+    proc = subprocess.run(
+        [
+            args.tkn,
+            "pipelinerun",
+            "describe",
+            pipeline_run,
+            "--namespace",
+            args.namespace,
+            "--output",
+            "jsonpath={.status.conditions[0].status}",
+        ],
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise PipelineException(
+            f"tkn pipelinerun describe failed: {proc.stderr.strip()}"
+        )
+    return proc.stdout.strip() == "True"
+
+
+def run_pipeline(
+    args: argparse.Namespace,
+    state: State,
+    operator: str,
+    processes: dict,
+    stop: threading.Event,
+) -> None:
+    """Start (or follow) the pipeline of one operator and stream its log to a file."""
+    if stop.is_set():
+        return
+    previous = state.operators[operator]
+    if previous.status == RUNNING and previous.pipeline_run:
+        cmd = pipeline_logs_cmd(args, previous.pipeline_run)
+        logging.info(f"{operator}: following {previous.pipeline_run}")
+        state.update(operator, error=None)
+        log_mode = "a"
+    else:
+        cmd = pipeline_start_cmd(args, operator)
+        logging.info(f"{operator}: starting pipeline")
+        state.update(
+            operator,
+            status=RUNNING,
+            pipeline_run=None,
+            pr_url=None,
+            started=time.time(),
+            finished=None,
+            error=None,
+        )
+        log_mode = "w"
+
+    log_file = args.log_dir / f"{operator}.log"
+    try:
+        with log_file.open(log_mode) as log:
+            # Start a new session so Ctrl-C is not delivered to tkn directly.
+            with subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                start_new_session=True,
+            ) as proc:
+                processes[operator] = proc
+                for line in proc.stdout:
+                    log.write(line)
+                    log.flush()
+                    if match := PIPELINE_RUN.search(line):
+                        state.update(operator, pipeline_run=match.group(1))
+                    elif match := PR_URL.search(line):
+                        state.update(operator, pr_url=match.group(1))
+                        logging.info(f"{operator}: upstream PR {match.group(1)}")
+            processes.pop(operator, None)
+    except OSError as e:
+        state.update(operator, status=FAILED, finished=time.time(), error=str(e))
+        return
+
+    if stop.is_set():
+        # Interrupted: the pipeline run keeps running and is followed on the next start.
+        return
+
+    pipeline_run = state.operators[operator].pipeline_run
+    if proc.returncode != 0:
+        error = f"tkn exited with {proc.returncode}, see {log_file}"
+    elif not pipeline_run:
+        error = f"no PipelineRun name found in {log_file}"
+    else:
+        try:
+            error = (
+                None
+                if pipeline_run_succeeded(args, pipeline_run)
+                else f"{pipeline_run} failed, see {log_file}"
+            )
+        except PipelineException as e:
+            error = str(e)
+    state.update(
+        operator,
+        status=FAILED if error else SUCCEEDED,
+        finished=time.time(),
+        error=error,
+    )
+    logging.info(f"{operator}: {'FAILED' if error else 'succeeded'}")
+
+
+def print_summary(args: argparse.Namespace, state: State) -> None:
+    print(f"\nCertification pipelines for release {args.version}:")
+    for s in state.operators.values():
+        detail = s.error or s.pr_url or s.pipeline_run or ""
+        print(
+            f"  {s.operator:<14} {s.status.upper():<10} {s.elapsed / 60:6.1f}m  {detail}"
+        )
+    counts = {}
+    for s in state.operators.values():
+        counts[s.status] = counts.get(s.status, 0) + 1
+    print(", ".join(f"{n} {status}" for status, n in counts.items()))
+    print(f"Logs and state: {args.log_dir}")
+
+
+def main(argv) -> int:
+    args = parse_args(argv[1:])
+    logging.basicConfig(
+        encoding="utf-8", level=args.log_level, format="%(asctime)s %(message)s"
+    )
+
+    args.log_dir.mkdir(parents=True, exist_ok=True)
+    state = State(args.log_dir / "state.json", args.operators)
+    todo = [op for op, s in state.operators.items() if s.status != SUCCEEDED]
+    for op in args.operators:
+        if op not in todo:
+            logging.info(f"{op}: already succeeded, skipping")
+    state.save()
+
+    processes: dict[str, subprocess.Popen] = {}
+    stop = threading.Event()
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, args.jobs))
+    try:
+        futures = [
+            pool.submit(run_pipeline, args, state, op, processes, stop) for op in todo
+        ]
+        for future in concurrent.futures.as_completed(futures):
+            future.result()
+    except KeyboardInterrupt:
+        logging.warning(
+            "Interrupted. Started pipeline runs keep running; run again to resume."
+        )
+        stop.set()
+        for proc in list(processes.values()):
+            proc.send_signal(signal.SIGTERM)
+        pool.shutdown(wait=True, cancel_futures=True)
+        print_summary(args, state)
+        return 130
+    pool.shutdown()
+
+    print_summary(args, state)
+    return 0 if all(s.status == SUCCEEDED for s in state.operators.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,47 @@
+"""
+Console entry points of the OLM tools, see pyproject.toml.
+
+The scripts in this directory are uv scripts: every start resolves their inline
+dependencies and compiles the script again. Installed as a tool, the commands
+start in a prepared environment and import the scripts as modules, so their
+bytecode is cached:
+
+    uv tool install --editable ./olm
+    build-manifests --release 26.3.0 --repo-operator ~/repo/stackable/airflow-operator --openshift-versions v4.18-v4.21
+
+The installation must be editable: the commands run the scripts of this checkout.
+"""
+
+import importlib.util
+import pathlib
+import sys
+
+OLM_DIR = pathlib.Path(__file__).resolve().parent
+
+
+def load_script(file_name: str):
+    """Import a script of this directory (its file name is not a valid module name)."""
+    module_name = file_name.removesuffix(".py").replace("-", "_")
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    path = OLM_DIR / file_name
+    if not path.exists():
+        sys.exit(f"{path} not found. Install the OLM tools with --editable.")
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    # Registered before it runs, so the process pools of the script can pickle its functions.
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def build_manifests() -> int:
+    return load_script("build-manifests.py").main(sys.argv)
+
+
+def validate_bundles() -> int:
+    return load_script("validate-bundles.py").main(sys.argv)
+
+
+def run_certification_pipelines() -> int:
+    return load_script("run-certification-pipelines.py").main(sys.argv)
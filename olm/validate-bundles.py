@@ -0,0 +1,487 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#   "pyyaml",
+# ]
+# ///
+"""
+Validate OLM bundles before submitting them to the certification pipeline.
+
+Checks the CSV, the CRDs and metadata/annotations.yaml of every bundle against
+the structure the pipeline expects and the rules between them (e.g. every
+image of the operator deployment is listed in relatedImages). The bundles are
+validated in parallel and all problems are reported at once.
+
+Usage:
+
+    # All bundles in the certification repository
+    ./olm/validate-bundles.py -c ~/repo/stackable/openshift-certified-operators
+
+    # Only the bundles of one release
+    ./olm/validate-bundles.py -c ~/repo/stackable/openshift-certified-operators --release 26.3.0
+
+    # Some bundle directories
+    ./olm/validate-bundles.py openshift-certified-operators/operators/stackable-airflow-operator/26.3.0
+
+build-manifests.py runs the same checks before writing a bundle when called
+with --preflight.
+"""
+
+import argparse
+import concurrent.futures
+import os
+import pathlib
+import re
+import sys
+import time
+
+from collections.abc import Callable, Iterator
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
+
+ANNOTATIONS_PATH = pathlib.Path("metadata", "annotations.yaml")
+MANIFESTS_DIR = "manifests"
+
+OPENSHIFT_VERSIONS = re.compile(r"^(=?v4\.\d+|v4\.(\d+)-v4\.(\d+))$")
+DIGEST = re.compile(r"@sha256:[0-9a-f]{64}$")
+
+# Expected structure of the manifests. A type is checked with isinstance, a
+# dict lists required keys and a list with one element requires a non-empty
+# list whose items match that element.
+OBJECT_SCHEMA = {"apiVersion": str, "kind": str, "metadata": {"name": str}}
+
+CSV_SCHEMA = {
+    "metadata": {"name": str, "annotations": {"containerImage": str}},
+    "spec": {
+        "version": str,
+        "install": {
+            "strategy": str,
+            "spec": {
+                "clusterPermissions": [{"serviceAccountName": str, "rules": list}],
+                "deployments": [
+                    {
+                        "name": str,
+                        "spec": {
+                            "template": {
+                                "spec": {"containers": [{"name": str, "image": str}]}
+                            }
+                        },
+                    }
+                ],
+            },
+        },
+        "relatedImages": [{"name": str, "image": str}],
+    },
+}
+
+CRD_SCHEMA = {
+    "spec": {
+        "group": str,
+        "names": {"kind": str, "plural": str},
+        "scope": str,
+        "versions": [{"name": str, "served": bool, "storage": bool}],
+    },
+}
+
+ANNOTATIONS_SCHEMA = {
+    "annotations": {
+        "com.redhat.openshift.versions": str,
+        "operators.operatorframework.io.bundle.channel.default.v1": str,
+        "operators.operatorframework.io.bundle.channels.v1": str,
+        "operators.operatorframework.io.bundle.manifests.v1": str,
+        "operators.operatorframework.io.bundle.mediatype.v1": str,
+        "operators.operatorframework.io.bundle.metadata.v1": str,
+        "operators.operatorframework.io.bundle.package.v1": str,
+    }
+}
+
+Validator = Callable[[object, str], Iterator[str]]
+
+
+def compile_schema(schema) -> Validator:
+    """Turn a schema (see OBJECT_SCHEMA) into a function yielding the problems of a value."""
+    if isinstance(schema, type):
+
+        def check_type(value, path: str) -> Iterator[str]:
+            if not isinstance(value, schema):
+                yield f"{path}: expected {schema.__name__}, got {type(value).__name__}"
+
+        return check_type
+
+    if isinstance(schema, list):
+        check_item = compile_schema(schema[0])
+
+        def check_list(value, path: str) -> Iterator[str]:
+            if not isinstance(value, list) or not value:
+                yield f"{path}: expected a non-empty list"
+                return
+            for i, item in enumerate(value):
+                yield from check_item(item, f"{path}[{i}]")
+
+        return check_list
+
+    fields = {key: compile_schema(value) for key, value in schema.items()}
+
+    def check_mapping(value, path: str) -> Iterator[str]:
+        if not isinstance(value, dict):
+            yield f"{path}: expected a mapping"
+            return
+        for key, check_field in fields.items():
+            if key not in value:
+                yield f"{path}.{key}: missing"
+            else:
+                yield from check_field(value[key], f"{path}.{key}")
+
+    return check_mapping
+
+
+CHECK_OBJECT = compile_schema(OBJECT_SCHEMA)
+CHECK_CSV = compile_schema(CSV_SCHEMA)
+CHECK_CRD = compile_schema(CRD_SCHEMA)
+CHECK_ANNOTATIONS = compile_schema(ANNOTATIONS_SCHEMA)
+
+
+def validate_bundle(
+    files: dict[pathlib.Path, str],
+    release: str | None = None,
+    package: str | None = None,
+    allow_tags: bool = False,
+) -> list[str]:
+    """Return the problems of a bundle given as relative path -> content.
+
+    `release` and `package` are compared with the CSV version and the package
+    annotation if given. Images must be pinned to a digest unless `allow_tags`.
+    """
+    errors = []
+    objects: dict[pathlib.Path, dict] = {}
+    for path, content in files.items():
+        if path == ANNOTATIONS_PATH:
+            continue
+        if path.parts[0] != MANIFESTS_DIR:
+            errors.append(f"{path}: unexpected file outside of {MANIFESTS_DIR}/")
+            continue
+        try:
+            docs = [d for d in yaml.load_all(content, Loader=YamlLoader) if d]
+        except yaml.YAMLError as e:
+            errors.append(f"{path}: invalid YAML: {e}")
+            continue
+        if len(docs) != 1:
+            errors.append(f"{path}: expected one object, found {len(docs)}")
+            continue
+        object_errors = list(CHECK_OBJECT(docs[0], path.name))
+        if object_errors:
+            errors.extend(object_errors)
+        else:
+            objects[path] = docs[0]
+
+    errors.extend(check_file_names(objects))
+
+    csvs = [
+        (path, m) for path, m in objects.items() if m["kind"] == "ClusterServiceVersion"
+    ]
+    if len(csvs) != 1:
+        errors.append(f"expected one ClusterServiceVersion, found {len(csvs)}")
+    for path, csv in csvs:
+        errors.extend(check_csv(path, csv, release, allow_tags))
+
+    for path, m in objects.items():
+        if m["kind"] == "CustomResourceDefinition":
+            errors.extend(check_crd(path, m))
+
+    if ANNOTATIONS_PATH in files:
+        errors.extend(check_annotations(files[ANNOTATIONS_PATH], package))
+    else:
+        errors.append(f"{ANNOTATIONS_PATH}: missing")
+
+    return errors
+
+
+def check_file_names(objects: dict[pathlib.Path, dict]) -> Iterator[str]:
+    """Report objects defined twice and file names that only differ in case."""
+    seen_objects = {}
+    seen_names = {}
+    for path, m in objects.items():
+        key = (m["kind"], m["metadata"]["name"])
+        if key in seen_objects:
+            yield f"{path.name}: {key[0]} '{key[1]}' is also defined in {seen_objects[key].name}"
+        seen_objects[key] = path
+        if path.name.lower() in seen_names:
+            yield f"{path.name}: conflicts with {seen_names[path.name.lower()].name} on case-insensitive file systems"
+        seen_names[path.name.lower()] = path
+        if (
+            m["kind"] == "CustomResourceDefinition"
+            and path.name != f"{m['metadata']['name']}.customresourcedefinition.yaml"
+        ):
+            yield f"{path.name}: file name does not match the CRD name '{m['metadata']['name']}'"
+        if m["kind"] == "ClusterServiceVersion" and not path.name.endswith(
+            ".clusterserviceversion.yaml"
+        ):
+            yield f"{path.name}: the CSV file name must end with .clusterserviceversion.yaml"
+
+
+def check_csv(
+    path: pathlib.Path, csv: dict, release: str | None, allow_tags: bool
+) -> list[str]:
+    errors = list(CHECK_CSV(csv, path.name))
+    if errors:
+        return errors
+
+    spec = csv["spec"]
+    install = spec["install"]
+    version = spec["version"]
+    if release and version != release:
+        errors.append(f"{path.name}: spec.version '{version}' is not '{release}'")
+    if not csv["metadata"]["name"].endswith(f".v{version}"):
+        errors.append(
+            f"{path.name}: metadata.name '{csv['metadata']['name']}' does not end with '.v{version}'"
+        )
+    if install["strategy"] != "deployment":
+        errors.append(
+            f"{path.name}: unsupported install strategy '{install['strategy']}'"
+        )
+
+    related = {}
+    for entry in spec["relatedImages"]:
+        if entry["name"] in related:
+            errors.append(
+                f"{path.name}: relatedImages contains '{entry['name']}' more than once"
+            )
+        related[entry["name"]] = entry["image"]
+    related_images = set(related.values())
+
+    service_accounts = {
+        p["serviceAccountName"]
+        for p in [
+            *install["spec"]["clusterPermissions"],
+            *install["spec"].get("permissions", []),
+        ]
+    }
+    deployment_images = set()
+    for deployment in install["spec"]["deployments"]:
+        name = deployment["name"]
+        deployment_spec = deployment["spec"]
+        pod_spec = deployment_spec["template"]["spec"]
+        containers = [*pod_spec["containers"], *pod_spec.get("initContainers", [])]
+        deployment_images.update(c["image"] for c in containers)
+        for c in containers:
+            if c["image"] not in related_images:
+                errors.append(
+                    f"{path.name}: image '{c['image']}' of container '{c['name']}' in deployment '{name}' is missing in relatedImages"
+                )
+        account = pod_spec.get("serviceAccountName")
+        if account and account not in service_accounts:
+            errors.append(
+                f"{path.name}: service account '{account}' of deployment '{name}' has no permissions"
+            )
+        selector = deployment_spec.get("selector", {}).get("matchLabels", {})
+        labels = deployment_spec["template"].get("metadata", {}).get("labels", {})
+        if any(labels.get(k) != v for k, v in selector.items()):
+            errors.append(
+                f"{path.name}: selector of deployment '{name}' does not match its pod template labels"
+            )
+
+    container_image = csv["metadata"]["annotations"]["containerImage"]
+    if container_image not in deployment_images:
+        errors.append(
+            f"{path.name}: containerImage '{container_image}' is not used by any deployment"
+        )
+
+    if not allow_tags:
+        for image in sorted(related_images | deployment_images | {container_image}):
+            if not DIGEST.search(image):
+                errors.append(f"{path.name}: image '{image}' is not pinned to a digest")
+    return errors
+
+
+def check_crd(path: pathlib.Path, crd: dict) -> list[str]:
+    errors = list(CHECK_CRD(crd, path.name))
+    if errors:
+        return errors
+
+    spec = crd["spec"]
+    expected_name = f"{spec['names']['plural']}.{spec['group']}"
+    if crd["metadata"]["name"] != expected_name:
+        errors.append(
+            f"{path.name}: metadata.name must be '{expected_name}' (<plural>.<group>)"
+        )
+    storage = [v["name"] for v in spec["versions"] if v["storage"]]
+    if len(storage) != 1:
+        errors.append(
+            f"{path.name}: expected exactly one storage version, found {len(storage)}"
+        )
+    for v in spec["versions"]:
+        if v["served"] and not isinstance(
+            v.get("schema", {}).get("openAPIV3Schema"), dict
+        ):
+            errors.append(
+                f"{path.name}: served version '{v['name']}' has no openAPIV3Schema"
+            )
+    return errors
+
+
+def check_annotations(content: str, package: str | None) -> list[str]:
+    name = str(ANNOTATIONS_PATH)
+    try:
+        data = yaml.load(content, Loader=YamlLoader)
+    except yaml.YAMLError as e:
+        return [f"{name}: invalid YAML: {e}"]
+    errors = list(CHECK_ANNOTATIONS(data, name))
+    if errors:
+        return errors
+
+    annos = data["annotations"]
+    openshift_versions = annos["com.redhat.openshift.versions"]
+    if not (match := OPENSHIFT_VERSIONS.match(openshift_versions)):
+        errors.append(
+            f"{name}: invalid OpenShift version range '{openshift_versions}'. Example: v4.18-v4.21"
+        )
+    elif match.group(2) and int(match.group(2)) > int(match.group(3)):
+        errors.append(
+            f"{name}: OpenShift version range '{openshift_versions}' is empty"
+        )
+
+    channels = annos["operators.operatorframework.io.bundle.channels.v1"].split(",")
+    default_channel = annos["operators.operatorframework.io.bundle.channel.default.v1"]
+    if default_channel not in channels:
+        errors.append(
+            f"{name}: default channel '{default_channel}' is not one of the channels {channels}"
+        )
+
+    expected = {
+        "operators.operatorframework.io.bundle.mediatype.v1": "registry+v1",
+        "operators.operatorframework.io.bundle.manifests.v1": f"{MANIFESTS_DIR}/",
+        "operators.operatorframework.io.bundle.metadata.v1": f"{ANNOTATIONS_PATH.parent}/",
+    }
+    if package:
+        expected["operators.operatorframework.io.bundle.package.v1"] = package
+    for key, value in expected.items():
+        if annos[key] != value:
+            errors.append(f"{name}: {key} must be '{value}', got '{annos[key]}'")
+    return errors
+
+
+def read_bundle(bundle_dir: pathlib.Path) -> dict[pathlib.Path, str]:
+    return {
+        path.relative_to(bundle_dir): path.read_text()
+        for path in sorted(bundle_dir.rglob("*"))
+        if path.is_file()
+    }
+
+
+def validate_bundle_dir(
+    bundle_dir: pathlib.Path, allow_tags: bool = False
+) -> list[str]:
+    """Validate a bundle in operators/<package>/<release> of the certification repository."""
+    return validate_bundle(
+        read_bundle(bundle_dir),
+        release=bundle_dir.name,
+        package=bundle_dir.parent.name,
+        allow_tags=allow_tags,
+    )
+
+
+def find_bundles(
+    repo_certified_operators: pathlib.Path, release: str | None
+) -> list[pathlib.Path]:
+    return sorted(
+        manifests.parent
+        for manifests in (repo_certified_operators / "operators").glob(
+            f"*/{release or '*'}/{MANIFESTS_DIR}"
+        )
+    )
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Validate OLM bundles before running the certification pipeline.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument(
+        "bundle_dirs",
+        help="Bundle directories (operators/<package>/<release>) to validate.",
+        nargs="*",
+        type=pathlib.Path,
+    )
+    parser.add_argument(
+        "-c",
+        "--repo-certified-operators",
+        help="Validate all bundles in this certified operators repository.",
+        type=pathlib.Path,
+    )
+    parser.add_argument(
+        "-r",
+        "--release",
+        help="Only validate the bundles of this release. Used with --repo-certified-operators.",
+    )
+    parser.add_argument(
+        "--allow-tags",
+        help="Do not require images to be pinned to a digest (e.g. for bundles built with --use-helm-images).",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        help="Number of bundles validated in parallel. Default: number of CPUs.",
+        type=cli_positive_int,
+        default=os.cpu_count() or 1,
+    )
+    args = parser.parse_args(argv)
+    if not args.bundle_dirs and not args.repo_certified_operators:
+        parser.error(
+            "either bundle directories or --repo-certified-operators is required"
+        )
+    return args
+
+
+def cli_positive_int(cli_arg: str) -> int:
+    try:
+        value = int(cli_arg)
+    except ValueError:
+        value = 0
+    if value < 1:
+        raise argparse.ArgumentTypeError("Expected a positive integer")
+    return value
+
+
+def main(argv) -> int:
+    args = parse_args(argv[1:])
+    bundle_dirs = list(args.bundle_dirs)
+    if args.repo_certified_operators:
+        bundle_dirs += find_bundles(args.repo_certified_operators, args.release)
+    if not bundle_dirs:
+        print("No bundles found", file=sys.stderr)
+        return 1
+
+    start = time.monotonic()
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=min(args.jobs, len(bundle_dirs))
+    ) as pool:
+        results = list(
+            pool.map(
+                validate_bundle_dir,
+                bundle_dirs,
+                [args.allow_tags] * len(bundle_dirs),
+            )
+        )
+
+    failed = 0
+    for bundle_dir, errors in zip(bundle_dirs, results):
+        print(f"{'FAILED' if errors else 'OK':<7} {bundle_dir}")
+        for error in errors:
+            print(f"        {error}")
+        failed += bool(errors)
+    print(
+        f"{len(bundle_dirs) - failed} valid, {failed} invalid bundle(s) in {time.monotonic() - start:.1f}s"
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -13,18 +13,16 @@ REMOTE="origin"
 #----------------------------------------------------------------------------------------------------
 RELEASE_REGEX="^[0-9][0-9]\.([1-9]|[1][0-2])$"
 
+# Clone or update the given repositories (in parallel and from a local mirror, see prepare-repos.py)
+# and switch to the release branch. The branch is created from main unless it exists already
+# (e.g. if continuing from someone else).
+prepare_repos() {
+  "$INITIAL_DIR"/release/prepare-repos.py --base-dir "$BASE_DIR" --branch "$RELEASE_BRANCH" "$@"
+}
+
 update_products() {
-  if [ -d "$BASE_DIR/$DOCKER_IMAGES_REPO" ]; then
-    echo "Directory exists. Switching to ${RELEASE_BRANCH} branch and Updating..."
-    cd "$BASE_DIR/$DOCKER_IMAGES_REPO"
-    git pull && git switch "${RELEASE_BRANCH}" # Switch to local branch (remote doesn't yet exist)
-  else
-    echo "Repo directory ($BASE_DIR/$DOCKER_IMAGES_REPO) doesn't exist. Cloning and switching to ${RELEASE_BRANCH} branch"
-    git clone --branch main --depth 1 "git@github.com:stackabletech/${DOCKER_IMAGES_REPO}.git" "$BASE_DIR/$DOCKER_IMAGES_REPO"
-    cd "$BASE_DIR/$DOCKER_IMAGES_REPO"
-    # try to switch to the release branch (if continuing from someone else), or create it
-    git switch "${RELEASE_BRANCH}" 2> /dev/null || git switch -c "${RELEASE_BRANCH}"
-  fi
+  prepare_repos "$DOCKER_IMAGES_REPO"
+  cd "$BASE_DIR/$DOCKER_IMAGES_REPO"
 
   push_branch "$DOCKER_IMAGES_REPO"
 
@@ -33,32 +31,18 @@ update_products() {
 }
 
 update_operators() {
+  prepare_repos --release-config "$INITIAL_DIR"/release/config.yaml
+
   while IFS="" read -r operator || [ -n "$operator" ]
   do
-    if [ -d "$BASE_DIR/${operator}" ]; then
-      echo "Directory exists. Switching to ${RELEASE_BRANCH} branch and Updating..."
-      cd "$BASE_DIR/${operator}"
-      git pull && git switch "${RELEASE_BRANCH}" # Switch to local branch (remote doesn't yet exist)
-    else
-      echo "Repo directory ($BASE_DIR/$operator) doesn't exist. Cloning and switching to ${RELEASE_BRANCH} branch"
-      git clone --branch main --depth 1 "git@github.com:stackabletech/${operator}.git" "$BASE_DIR/${operator}"
-      cd "$BASE_DIR/${operator}"
-      # try to switch to the release branch (if continuing from someone else), or create it
-      git switch "${RELEASE_BRANCH}" || git switch -c "${RELEASE_BRANCH}"
-    fi
+    cd "$BASE_DIR/${operator}"
     push_branch "$operator"
   done < <(yq '... comments="" | .operators[] ' "$INITIAL_DIR"/release/config.yaml)
 }
 
 update_demos() {
-  if [ -d "$BASE_DIR/$DEMOS_REPO" ]; then
-    cd "$BASE_DIR/$DEMOS_REPO"
-    git pull && git switch "${RELEASE_BRANCH}"
-  else
-    git clone --branch main --depth 1 "git@github.com:stackabletech/${DEMOS_REPO}.git" "$BASE_DIR/$DEMOS_REPO"
-    cd "$BASE_DIR/$DEMOS_REPO"
-    git switch "${RELEASE_BRANCH}" 2> /dev/null  || git switch -c "${RELEASE_BRANCH}"
-  fi
+  prepare_repos "$DEMOS_REPO"
+  cd "$BASE_DIR/$DEMOS_REPO"
 
   # Search and replace known references to stackableRelease, container images, branch references.
   # https://github.com/stackabletech/demos/blob/main/.scripts/update_refs.sh
@@ -28,7 +28,14 @@ rc_branch_products() {
 }
 
 rc_branch_operators() {
-	while IFS="" read -r operator || [ -n "$operator" ]; do
+	local operators
+	mapfile -t operators < <(yq '... comments="" | .operators[] ' "$INITIAL_DIR"/release/config.yaml)
+
+	# Update the versions in the docs and tests of all operators at once.
+	# The PR branches have been created by check_operators already.
+	"$INITIAL_DIR"/release/update-code.py --release-tag "$RELEASE_TAG" "${operators[@]/#/$TEMP_RELEASE_FOLDER/}"
+
+	for operator in "${operators[@]}"; do
 		cd "${TEMP_RELEASE_FOLDER}/${operator}"
 		git switch "$PR_BRANCH"
 
@@ -45,8 +52,6 @@ rc_branch_operators() {
 		nix-shell --run 'make regenerate-charts'
 		nix-shell --run 'make regenerate-nix'
 
-		update_code "$TEMP_RELEASE_FOLDER/${operator}"
-
 		# ensure .j2 changes are resolved
 		"$TEMP_RELEASE_FOLDER/${operator}"/scripts/docs_templating.sh
 
@@ -55,7 +60,7 @@ rc_branch_operators() {
 
 		git commit -sam "chore: Release $RELEASE_TAG"
 		push_branch
-	done < <(yq '... comments="" | .operators[] ' "$INITIAL_DIR"/release/config.yaml)
+	done
 }
 
 rc_branch_repos() {
@@ -67,101 +72,26 @@ rc_branch_repos() {
 	fi
 }
 
-check_tag_is_valid() {
-	git fetch --tags
-
-	# check tags: N.B. look for exact match
-	if git tag --list | grep -E "^$RELEASE_TAG\$"; then
-		>&2 echo "Tag $RELEASE_TAG already exists!"
-		exit 1
-	fi
-
-	# Do we want proper semver version checking?
-	# We should switch this script to python if so.
-	#EXISTING_TAGS=$(git tag --list | grep -E "$RELEASE" | sort -V)
-	#for EXISTING_TAG in $EXISTING_TAGS; do
-	#	if [[ "$RELEASE_TAG" < "$EXISTING_TAG" ]]; then
-	#		>&2 echo "Error: Proposed tag $RELEASE_TAG is earlier than existing tag $EXISTING_TAG."
-	#		exit 1
-	#	fi
-	#done
+# Clone or update the given repositories (in parallel and from a local mirror, see prepare-repos.py),
+# check that the release branch exists and that neither the PR branch nor the tag exist yet,
+# and create the PR branch off of the release branch. No PR branch is created if any check fails.
+prepare_pr_branches() {
+	"$INITIAL_DIR"/release/prepare-repos.py \
+		--base-dir "$TEMP_RELEASE_FOLDER" \
+		--from-branch "$RELEASE_BRANCH" \
+		--branch "$PR_BRANCH" \
+		--tag "$RELEASE_TAG" \
+		"$@"
 }
 
 check_products() {
 	echo "Checking products"
-
-	if [ ! -d "$TEMP_RELEASE_FOLDER/$DOCKER_IMAGES_REPO" ]; then
-		echo "Cloning folder: $TEMP_RELEASE_FOLDER/$DOCKER_IMAGES_REPO"
-  		# $TEMP_RELEASE_FOLDER has already been created in main()
-  		git clone "git@github.com:stackabletech/${DOCKER_IMAGES_REPO}.git" "$TEMP_RELEASE_FOLDER/$DOCKER_IMAGES_REPO"
-	fi
-	cd "$TEMP_RELEASE_FOLDER/$DOCKER_IMAGES_REPO"
-
-	# Need to update here because if we deleted the local state, or someone else continues
-    # we might be back on main, or on the release branch without having pulled updates from fixes.
-	git fetch && git switch "$RELEASE_BRANCH" && git pull
-
-	# switch to the release branch, which should exist as tagging
-	# is subsequent to creating the branch.
-	# Note, if this needs to check the branch exists locally, then use:
-	# "^[ *]*$RELEASE_BRANCH\$"
-	if ! git branch -a | grep -E "$RELEASE_BRANCH\$"; then
-		>&2 echo "Expected release branch is missing: $RELEASE_BRANCH"
-		exit 1
-	fi
-
-	# the new PR should not exist, otherwise a duplicate commit
-	# will be prepared
-	# Note, if this needs to check the branch exists locally, then use:
-	# "^[ *]*$PR_BRANCH\$"
-	if git branch -a | grep -E "$PR_BRANCH\$"; then
-		>&2 echo "PR branch already exists: ${REMOTE}/$PR_BRANCH"
-		exit 1
-	fi
-
-	# create a new branch for the PR off of this
-	git switch -c "$PR_BRANCH" "$RELEASE_BRANCH"
-
-	check_tag_is_valid
+	prepare_pr_branches "$DOCKER_IMAGES_REPO"
 }
 
 check_operators() {
 	echo "Checking operators"
-
-	while IFS="" read -r operator || [ -n "$operator" ]; do
-		echo "Operator: $operator"
-		if [ ! -d "$TEMP_RELEASE_FOLDER/${operator}" ]; then
-			echo "Cloning folder: $TEMP_RELEASE_FOLDER/${operator}"
-			# $TEMP_RELEASE_FOLDER has already been created in main()
-			git clone "git@github.com:stackabletech/${operator}.git" "$TEMP_RELEASE_FOLDER/${operator}"
-
-		fi
-		cd "$TEMP_RELEASE_FOLDER/${operator}"
-
-		# Need to update here because if we deleted the local state, or someone else continues
-		# we might be back on main, or on the release branch without having pulled updates from fixes.
-		git fetch && git switch "$RELEASE_BRANCH" && git pull
-		# Note, if this needs to check the branch exists locally, then use:
-		# "^[ *]*$RELEASE_BRANCH\$"
-		if ! git branch -a | grep -E "$RELEASE_BRANCH\$"; then
-			>&2 echo "Expected release branch is missing: ${operator}/$RELEASE_BRANCH"
-			exit 1
-		fi
-
-		# the new PR should not exist, otherwise a duplicate commit
-		# will be prepared
-		# Note, if this needs to check the branch exists locally, then use:
-		# "^[ *]*$PR_BRANCH\$"
-		if git branch -a | grep -E "$PR_BRANCH\$"; then
-			>&2 echo "PR branch already exists: ${operator}/$PR_BRANCH"
-			exit 1
-		fi
-
-		# create a new branch for the PR off of this
-		git switch -c "$PR_BRANCH" "$RELEASE_BRANCH"
-
-		check_tag_is_valid
-	done < <(yq '... comments="" | .operators[] ' "$INITIAL_DIR"/release/config.yaml)
+	prepare_pr_branches --release-config "$INITIAL_DIR"/release/config.yaml
 }
 
 checks() {
@@ -173,52 +103,6 @@ checks() {
 	fi
 }
 
-update_code() {
-	if [ -d "$1/docs" ]; then
-		echo "Updating antora docs for $1"
-
-		# antora version should be major.minor, not patch level
-		yq -i ".version = \"${RELEASE}\"" "$1/docs/antora.yml"
-		yq -i '.prerelease = false' "$1/docs/antora.yml"
-
-		# Not all operators have a getting started guide
-		# that's why we verify if templating_vars.yaml exists.
-		if [ -f "$1/docs/templating_vars.yaml" ]; then
-
-			# for an initial tag for a given release...
-			yq -i "(.versions.[] | select(. == \"*dev\")) |= \"${RELEASE_TAG}\"" "$1/docs/templating_vars.yaml"
-
-			# ...consider for patch releases/release candidates too
-			# We assume that the tag (e.g. 23.7.1) is applied to an earlier tag in the same
-			# release (e.g. 23.7.0) so search+replace on the major.minor tag will suffice.
-			# TODO: this may pick up versions of external components as well.
-			yq -i "(.versions.[] | select(. == \"${RELEASE}*\")) |= \"${RELEASE_TAG}\"" "$1/docs/templating_vars.yaml"
-
-			yq -i ".helm.repo_name |= sub(\"stackable-dev\", \"stackable-stable\")" "$1/docs/templating_vars.yaml"
-			yq -i ".helm.repo_url |= sub(\"helm-dev\", \"helm-stable\")" "$1/docs/templating_vars.yaml"
-		fi
-
-		# Replace "nightly" link so the documentation refers to the current version
-		for file in $(find "$1/docs" -name "*.adoc"); do
-			sed -i "s/nightly@home/home/g" "$file"
-		done
-	else
-		echo "No docs found under $1."
-	fi
-
-	# Update operator version for the integration tests
-	# (used when installing the operators).
-	yq -i ".releases.tests.products[].operatorVersion |= sub(\"0.0.0-dev\", \"${RELEASE_TAG}\")" "$1/tests/release.yaml"
-
-	# do this for patch releases/release candidates too.
-	# i.e. replace 24.11.0-rc1 with 24.11.0, 24.7.0 with 24.7.1 etc.
-	yq -i "(.releases.tests.products[].operatorVersion | select(. == \"${RELEASE}*\")) |= \"${RELEASE_TAG}\"" "$1/tests/release.yaml"
-
-	# Some tests perform **label** inspection and for (only) these cases specific labels should be updated.
-	# N.B. don't do this for all test files as not all images will necessarily exist for the given release tag.
-	find "$1/tests/templates/kuttl" -type f -print0 | xargs -0 sed -E -i "s#(app\.kubernetes\.io/version: \".*-stackable)[^\"]*#\1$RELEASE_TAG#"
-}
-
 push_branch() {
 	if $PUSH; then
 		echo "Pushing changes..."
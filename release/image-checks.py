@@ -0,0 +1,292 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#   "pyyaml",
+# ]
+# ///
+"""
+Check that all images of a release have been pushed to oci.stackable.tech.
+
+For every operator in release/config.yaml and every product version in
+release/image-checks.yaml the per-architecture images and the manifest list
+must exist:
+
+    sdp/<operator>:<release>[-<arch>]
+    sdp/<product>:<version>-stackable<release>[-<arch>]
+
+The tag list of each repository is fetched once (following pagination) and all
+repositories are queried concurrently. A JSON report of the missing tags is
+written to stdout. The exit code is 1 if anything is missing or could not be
+checked.
+
+Usage:
+
+    HARBOR_TOKEN=... ./release/image-checks.py --release 25.7.0
+
+    # Against a local registry (e.g. `docker run -p 5000:5000 registry:2`)
+    ./release/image-checks.py --release 25.7.0 --registry-url http://localhost:5000
+"""
+
+import argparse
+import concurrent.futures
+import getpass
+import http.client
+import json
+import logging
+import os
+import pathlib
+import re
+import sys
+import threading
+import time
+import urllib.parse
+
+import yaml
+
+RELEASE_DIR = pathlib.Path(__file__).parent
+REGISTRY_URL = "https://oci.stackable.tech"
+DEFAULT_PROJECT = "sdp"
+ARCHITECTURES = ["amd64", "arm64"]
+PAGE_SIZE = 1000
+MAX_WORKERS = 16
+RETRIES = 3
+TIMEOUT = 30
+
+# Link: </v2/sdp/airflow/tags/list?last=2.9.3&n=1000>; rel="next"
+NEXT_LINK = re.compile(r'<([^>]+)>\s*;\s*rel="?next"?')
+
+
+class CheckException(Exception):
+    pass
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Check that all images of a release exist in the registry.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument(
+        "-r", "--release", help="Release to check, e.g. 25.7.0", required=True
+    )
+    parser.add_argument(
+        "--release-config",
+        help="Release configuration with the list of operators. Default: release/config.yaml",
+        type=pathlib.Path,
+        default=RELEASE_DIR / "config.yaml",
+    )
+    parser.add_argument(
+        "--products",
+        help="File with the product versions to check. Default: release/image-checks.yaml",
+        type=pathlib.Path,
+        default=RELEASE_DIR / "image-checks.yaml",
+    )
+    parser.add_argument(
+        "--registry-url",
+        help=f"Base URL of the registry. Default: {REGISTRY_URL}",
+        default=REGISTRY_URL,
+    )
+    parser.add_argument(
+        "--arch",
+        help=f"Architectures that must be present. Default: {','.join(ARCHITECTURES)}",
+        type=lambda arg: arg.split(","),
+        default=ARCHITECTURES,
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        help=f"Number of repositories queried concurrently. Default: {MAX_WORKERS}",
+        type=cli_positive_int,
+        default=MAX_WORKERS,
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="Write the JSON report to this file instead of stdout.",
+        type=pathlib.Path,
+    )
+    parser.add_argument(
+        "--log-level",
+        help="Set log level.",
+        type=str.upper,
+        default="INFO",
+    )
+    return parser.parse_args(argv)
+
+
+def cli_positive_int(cli_arg: str) -> int:
+    try:
+        value = int(cli_arg)
+    except ValueError:
+        value = 0
+    if value < 1:
+        raise argparse.ArgumentTypeError("Expected a positive integer")
+    return value
+
+
+def expected_tags(args: argparse.Namespace) -> dict[str, list[str]]:
+    """Return the tags that must exist by repository (<project>/<name>)."""
+    operators = yaml.safe_load(args.release_config.read_text())["operators"]
+    products = yaml.safe_load(args.products.read_text())["products"]
+
+    expected = {}
+    for operator in operators:
+        expected[f"{DEFAULT_PROJECT}/{operator}"] = with_arch(args, args.release)
+    for product, versions in products.items():
+        repository = product if "/" in product else f"{DEFAULT_PROJECT}/{product}"
+        expected[repository] = [
+            tag
+            for version in versions
+            for tag in with_arch(args, f"{version}-stackable{args.release}")
+        ]
+    return expected
+
+
+def with_arch(args: argparse.Namespace, tag: str) -> list[str]:
+    return [*(f"{tag}-{arch}" for arch in args.arch), tag]
+
+
+def registry_connection(registry_url: str) -> http.client.HTTPConnection:
+    url = urllib.parse.urlsplit(registry_url)
+    if url.scheme == "http":
+        return http.client.HTTPConnection(url.netloc, timeout=TIMEOUT)
+    return http.client.HTTPSConnection(url.netloc, timeout=TIMEOUT)
+
+
+def get_json(
+    conn: http.client.HTTPConnection, path: str, headers: dict[str, str]
+) -> tuple[int, dict, str | None]:
+    """GET a JSON document. Returns the status, the body and the next page link (if any)."""
+    for attempt in range(RETRIES + 1):
+        try:
+            conn.request("GET", path, headers=headers)
+            response = conn.getresponse()
+            body = response.read()
+        except (OSError, http.client.HTTPException) as e:
+            # The server may have dropped the idle connection. Reconnect on the next attempt.
+            conn.close()
+            if attempt == RETRIES:
+                raise CheckException(f"Failed to fetch {path}: {e}")
+            time.sleep(0.5 * 2**attempt)
+            continue
+        if (response.status == 429 or response.status >= 500) and attempt < RETRIES:
+            # A 'Retry-After' header from the server (e.g. when rate limited) takes precedence.
+            retry_after = response.getheader("Retry-After", "")
+            delay = float(retry_after) if retry_after.isdigit() else 0.5 * 2**attempt
+            logging.warning(
+                f"HTTP {response.status} for {path}. Retrying in {delay:.1f}s"
+            )
+            time.sleep(delay)
+            continue
+        try:
+            data = json.loads(body) if response.status == 200 else {}
+        except ValueError as e:
+            raise CheckException(f"Invalid JSON response for {path}: {e}")
+        if not isinstance(data, dict):
+            raise CheckException(f"Unexpected response for {path}: {body[:100]!r}")
+        if link := NEXT_LINK.search(response.getheader("Link", "")):
+            # The link may be absolute or relative to the registry.
+            next_url = urllib.parse.urlsplit(link.group(1))
+            return response.status, data, f"{next_url.path}?{next_url.query}"
+        return response.status, data, None
+    raise AssertionError("unreachable")
+
+
+def fetch_tags(
+    conn: http.client.HTTPConnection, repository: str, headers: dict[str, str]
+) -> set[str] | None:
+    """Return all tags of a repository or None if the repository does not exist."""
+    tags = set()
+    path = f"/v2/{repository}/tags/list?n={PAGE_SIZE}"
+    while path:
+        logging.debug(f"Fetching {path}")
+        status, data, path = get_json(conn, path, headers)
+        if status == 404:
+            return None
+        if status != 200:
+            raise CheckException(f"Failed to list tags of {repository}: HTTP {status}")
+        tags.update(data.get("tags") or [])
+    return tags
+
+
+def check_images(
+    args: argparse.Namespace, expected: dict[str, list[str]], token: str | None
+) -> dict:
+    """Fetch the tag lists of all repositories concurrently and compare them to the expected tags."""
+    headers = {"Accept": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+
+    local = threading.local()
+    connections = []
+    connections_lock = threading.Lock()
+
+    def check(repository: str) -> dict:
+        if not hasattr(local, "conn"):
+            local.conn = registry_connection(args.registry_url)
+            with connections_lock:
+                connections.append(local.conn)
+        try:
+            tags = fetch_tags(local.conn, repository, headers)
+        except CheckException as e:
+            return {"error": str(e), "missing": []}
+        if tags is None:
+            return {"error": "repository not found", "missing": expected[repository]}
+        return {
+            "tags": len(tags),
+            "missing": [t for t in expected[repository] if t not in tags],
+        }
+
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=args.jobs) as pool:
+            results = dict(zip(expected, pool.map(check, expected)))
+    finally:
+        for conn in connections:
+            conn.close()
+
+    return {
+        "release": args.release,
+        "registry": args.registry_url,
+        "checked": sum(len(tags) for tags in expected.values()),
+        "missing": [
+            {"repository": repository, "tag": tag}
+            for repository, result in results.items()
+            for tag in result["missing"]
+        ],
+        "errors": {
+            repository: result["error"]
+            for repository, result in results.items()
+            if "error" in result
+        },
+    }
+
+
+def main(argv) -> int:
+    args = parse_args(argv[1:])
+    logging.basicConfig(encoding="utf-8", level=args.log_level)
+
+    token = os.environ.get("HARBOR_TOKEN")
+    if token is None and args.registry_url == REGISTRY_URL and sys.stdin.isatty():
+        token = getpass.getpass("Harbor Token (find it in the web UI): ")
+
+    start = time.monotonic()
+    expected = expected_tags(args)
+    report = check_images(args, expected, token)
+
+    output = json.dumps(report, indent=2) + "\n"
+    if args.output:
+        args.output.write_text(output)
+    else:
+        sys.stdout.write(output)
+
+    for repository, error in report["errors"].items():
+        logging.error(f"{repository}: {error}")
+    logging.info(
+        f"Checked {report['checked']} tags in {len(expected)} repositories in {time.monotonic() - start:.1f}s: {len(report['missing'])} missing"
+    )
+    return 1 if report["missing"] or report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
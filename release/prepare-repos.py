@@ -0,0 +1,319 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#   "pyyaml",
+# ]
+# ///
+"""
+Clone or update the repositories of a release and switch them to the release branch.
+
+Used by create-release-branch.sh and create-release-candidate-branch.sh to
+prepare all repositories on a pool of workers. Every repository is mirrored
+in a local cache (~/.cache/stackable-utils/git) and the working copies are
+cloned from and updated from that mirror, so repeated release runs only fetch
+what changed on GitHub. The `origin` remote of the working copies still points
+to GitHub, so branches are pushed as usual.
+
+Release branch (create-release-branch.sh): switch to the branch, creating it
+from main if it doesn't exist yet:
+
+    ./release/prepare-repos.py --base-dir /tmp/stackable-release-25.3 --branch release-25.3 airflow-operator
+
+PR branch (create-release-candidate-branch.sh): the release branch must exist,
+the PR branch and the tag must not. The PR branch is created from the release
+branch:
+
+    ./release/prepare-repos.py --base-dir /tmp/stackable-release-25.3 \\
+      --from-branch release-25.3 --branch pr-25.3.0 --tag 25.3.0 \\
+      --release-config release/config.yaml
+
+For testing, point --url-template (or $REPO_URL_TEMPLATE, which also works
+through the release scripts) to local bare repositories, e.g.
+'/tmp/remotes/{repo}.git'.
+"""
+
+import argparse
+import concurrent.futures
+import logging
+import os
+import pathlib
+import shutil
+import subprocess
+import sys
+import time
+
+import yaml
+
+URL_TEMPLATE = "git@github.com:stackabletech/{repo}.git"
+CACHE_DIR = (
+    pathlib.Path(os.environ.get("XDG_CACHE_HOME", pathlib.Path.home() / ".cache"))
+    / "stackable-utils"
+    / "git"
+)
+MAX_WORKERS = 8
+
+
+class RepoException(Exception):
+    pass
+
+
+def cli_positive_int(cli_arg: str) -> int:
+    try:
+        value = int(cli_arg)
+    except ValueError:
+        value = 0
+    if value < 1:
+        raise argparse.ArgumentTypeError("Expected a positive integer")
+    return value
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Clone or update release repositories in parallel and switch them to the release branch.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument("repos", help="Repository names.", nargs="*")
+    parser.add_argument(
+        "--release-config",
+        help="Also prepare all operators listed in this release configuration (e.g. release/config.yaml).",
+        type=pathlib.Path,
+    )
+    parser.add_argument(
+        "--base-dir",
+        help="Directory of the working copies.",
+        type=pathlib.Path,
+        required=True,
+    )
+    parser.add_argument(
+        "--branch", help="Branch to switch to, e.g. release-25.3", required=True
+    )
+    parser.add_argument(
+        "--start-point",
+        help="Create --branch from this branch if it does not exist. Default: main",
+        default="main",
+    )
+    parser.add_argument(
+        "--from-branch",
+        help="Existing branch to create --branch from. --branch must not exist yet.",
+    )
+    parser.add_argument(
+        "--tag", help="Fail if this tag exists already. Used with --from-branch."
+    )
+    parser.add_argument(
+        "--url-template",
+        help=f"URL of the repositories. Default: $REPO_URL_TEMPLATE or {URL_TEMPLATE}",
+        default=os.environ.get("REPO_URL_TEMPLATE", URL_TEMPLATE),
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help=f"Directory of the repository mirrors. Default: {CACHE_DIR}",
+        type=pathlib.Path,
+        default=CACHE_DIR,
+    )
+    parser.add_argument(
+        "--no-cache",
+        help="Clone and fetch directly from the remote without a mirror.",
+        dest="cache_dir",
+        action="store_const",
+        const=None,
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        help=f"Number of repositories prepared in parallel. Default: {MAX_WORKERS}",
+        type=cli_positive_int,
+        default=MAX_WORKERS,
+    )
+    parser.add_argument(
+        "--log-level",
+        help="Set log level.",
+        type=str.upper,
+        default="INFO",
+    )
+    args = parser.parse_args(argv)
+
+    if args.release_config:
+        args.repos.extend(yaml.safe_load(args.release_config.read_text())["operators"])
+    if not args.repos:
+        parser.error("either repository names or --release-config is required")
+    args.repos = list(dict.fromkeys(args.repos))
+    return args
+
+
+def git(*git_args, cwd: pathlib.Path | None = None) -> str:
+    logging.debug(f"git {' '.join(map(str, git_args))} (in {cwd or os.getcwd()})")
+    proc = subprocess.run(
+        ["git", *map(str, git_args)], cwd=cwd, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RepoException(
+            f"git {git_args[0]} failed: {proc.stderr.strip() or proc.stdout.strip()}"
+        )
+    return proc.stdout
+
+
+def ref_exists(repo_dir: pathlib.Path, ref: str) -> bool:
+    return (
+        subprocess.run(
+            ["git", "show-ref", "--verify", "--quiet", ref], cwd=repo_dir
+        ).returncode
+        == 0
+    )
+
+
+def update_mirror(args: argparse.Namespace, repo: str) -> pathlib.Path:
+    """Create or update the bare mirror of a repository. Returns its path.
+
+    Only branches and tags are mirrored. `git clone --mirror` would also fetch
+    the refs/pull/* refs of every pull request on GitHub.
+    """
+    url = args.url_template.format(repo=repo)
+    mirror = args.cache_dir / f"{repo}.git"
+    if (mirror / "HEAD").exists() and git_config(mirror, "remote.origin.mirror"):
+        logging.info(f"{repo}: replacing the full mirror {mirror}")
+        shutil.rmtree(mirror)
+    if (mirror / "HEAD").exists():
+        git("remote", "set-url", "origin", url, cwd=mirror)
+        git("fetch", "--prune", "origin", cwd=mirror)
+    else:
+        # Clone to a temporary directory so an interrupted clone is not mistaken for a mirror.
+        tmp = mirror.with_suffix(".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.parent.mkdir(parents=True, exist_ok=True)
+        git("clone", "--bare", url, tmp)
+        git("config", "remote.origin.fetch", "+refs/heads/*:refs/heads/*", cwd=tmp)
+        git(
+            "config",
+            "--add",
+            "remote.origin.fetch",
+            "+refs/tags/*:refs/tags/*",
+            cwd=tmp,
+        )
+        tmp.rename(mirror)
+    return mirror
+
+
+def git_config(repo_dir: pathlib.Path, key: str) -> str | None:
+    proc = subprocess.run(
+        ["git", "config", "--get", key], cwd=repo_dir, capture_output=True, text=True
+    )
+    return proc.stdout.strip() if proc.returncode == 0 else None
+
+
+def update_working_copy(args: argparse.Namespace, repo: str, source: str) -> None:
+    """Clone the working copy from `source` or fetch all branches and tags from it."""
+    url = args.url_template.format(repo=repo)
+    dest = args.base_dir / repo
+    if not dest.exists():
+        git("clone", source, dest)
+        git("remote", "set-url", "origin", url, cwd=dest)
+        return
+    # Fetching from the mirror updates the remote tracking branches without contacting GitHub.
+    git(
+        "fetch",
+        "--prune",
+        "--tags",
+        source,
+        "+refs/heads/*:refs/remotes/origin/*",
+        cwd=dest,
+    )
+
+
+def switch_branch(args: argparse.Namespace, repo_dir: pathlib.Path) -> str:
+    """Switch to the release branch (creating it if needed) and return a description."""
+    branch = args.branch
+    remote_branch = f"refs/remotes/origin/{branch}"
+    if ref_exists(repo_dir, f"refs/heads/{branch}"):
+        git("switch", branch, cwd=repo_dir)
+        if ref_exists(repo_dir, remote_branch):
+            git("merge", "--ff-only", f"origin/{branch}", cwd=repo_dir)
+        return f"switched to {branch}"
+    if ref_exists(repo_dir, remote_branch):
+        git("switch", branch, cwd=repo_dir)
+        return f"switched to {branch} from origin"
+    git(
+        "switch", "--no-track", "-c", branch, f"origin/{args.start_point}", cwd=repo_dir
+    )
+    return f"created {branch} from {args.start_point}"
+
+
+def check_pr_branch(args: argparse.Namespace, repo_dir: pathlib.Path) -> str:
+    """Check that the release branch exists and neither the PR branch nor the tag do."""
+    release_branch = args.from_branch
+    remote_release_branch = f"refs/remotes/origin/{release_branch}"
+    if not ref_exists(repo_dir, f"refs/heads/{release_branch}") and not ref_exists(
+        repo_dir, remote_release_branch
+    ):
+        raise RepoException(f"Expected release branch is missing: {release_branch}")
+    # the new PR branch should not exist, otherwise a duplicate commit will be prepared
+    for ref in (f"refs/heads/{args.branch}", f"refs/remotes/origin/{args.branch}"):
+        if ref_exists(repo_dir, ref):
+            raise RepoException(f"PR branch already exists: {args.branch}")
+    if args.tag and ref_exists(repo_dir, f"refs/tags/{args.tag}"):
+        raise RepoException(f"Tag {args.tag} already exists!")
+    return f"ready to create {args.branch} from {release_branch}"
+
+
+def create_pr_branch(args: argparse.Namespace, repo_dir: pathlib.Path) -> str:
+    """Create the PR branch from the up-to-date release branch."""
+    release_branch = args.from_branch
+    git("switch", release_branch, cwd=repo_dir)
+    if ref_exists(repo_dir, f"refs/remotes/origin/{release_branch}"):
+        git("merge", "--ff-only", f"origin/{release_branch}", cwd=repo_dir)
+    git("switch", "-c", args.branch, release_branch, cwd=repo_dir)
+    return f"created {args.branch} from {release_branch}"
+
+
+def prepare(args: argparse.Namespace, repo: str) -> str:
+    if args.cache_dir:
+        source = update_mirror(args, repo)
+    else:
+        source = args.url_template.format(repo=repo)
+    update_working_copy(args, repo, source)
+    repo_dir = args.base_dir / repo
+    if args.from_branch:
+        return check_pr_branch(args, repo_dir)
+    return switch_branch(args, repo_dir)
+
+
+def main(argv) -> int:
+    args = parse_args(argv[1:])
+    logging.basicConfig(encoding="utf-8", level=args.log_level)
+    args.base_dir.mkdir(parents=True, exist_ok=True)
+
+    def run_step(pool, step) -> list[tuple[str, float, str, bool]]:
+        """Run step(repo) for all repositories and report the outcome instead of raising."""
+
+        def isolated(repo: str) -> tuple[str, float, str, bool]:
+            start = time.monotonic()
+            try:
+                result, ok = step(repo), True
+            except RepoException as e:
+                result, ok = str(e), False
+            logging.info(f"{repo}: {result}")
+            return repo, time.monotonic() - start, result, ok
+
+        return list(pool.map(isolated, args.repos))
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        results = run_step(pool, lambda repo: prepare(args, repo))
+        failed = [r for r in results if not r[3]]
+        # Only create the PR branches once all repositories passed the checks,
+        # so a failed run can simply be repeated.
+        if args.from_branch and not failed:
+            results = run_step(
+                pool, lambda repo: create_pr_branch(args, args.base_dir / repo)
+            )
+            failed = [r for r in results if not r[3]]
+
+    print(f"\nRepositories in {args.base_dir}:")
+    for repo, elapsed, result, ok in results:
+        print(f"  {repo:<24} {'OK' if ok else 'FAILED':<7} {elapsed:6.1f}s  {result}")
+    print(f"{len(results) - len(failed)} prepared, {len(failed)} failed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,355 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#   "pyyaml",
+# ]
+# ///
+"""
+Update the versions in the docs and tests of operator repositories for a release.
+
+Applies the edits create-release-candidate-branch.sh needs for a release tag:
+
+- docs/antora.yml: version is set to <major>.<minor>, prerelease to false
+- docs/templating_vars.yaml: dev and earlier versions of the release are set
+  to the release tag, the Helm repository is switched from dev to stable
+- docs/**/*.adoc: "nightly@home" links are replaced with "home"
+- tests/release.yaml: the operator versions are set to the release tag
+- tests/templates/kuttl/**: app.kubernetes.io/version labels of the product
+  images are set to the release tag
+
+Every file is read once, all rules for it are applied in a single pass and it
+is only written if its content changed. The YAML files are edited line by
+line, so comments and formatting are preserved. The repositories are updated
+in parallel.
+
+Usage:
+
+    ./release/update-code.py --release-tag 25.3.0 /tmp/stackable-release-25.3/*-operator
+
+    # Show the changes without writing them
+    ./release/update-code.py --release-tag 25.3.0 --dry-run ~/repo/stackable/airflow-operator
+"""
+
+import argparse
+import concurrent.futures
+import dataclasses
+import difflib
+import fnmatch
+import os
+import pathlib
+import re
+import sys
+import time
+
+from collections.abc import Callable
+
+import yaml
+
+TAG_REGEX = re.compile(r"^[0-9][0-9]\.([1-9]|[1][0-2])\.[0-9]+(-rc[0-9]+)?$")
+
+# key: value  # comment
+YAML_KEY_VALUE = re.compile(
+    r"^(?P<indent> *)(?P<key>[\w.-]+):(?P<sep> *)(?P<value>(?:\"[^\"]*\"|'[^']*'|[^#\s][^#]*?)?)(?P<rest> *(?:#.*)?)$"
+)
+
+
+@dataclasses.dataclass
+class YamlRule:
+    """Replace the scalar at `path` (keys separated by '.', '*' matches any key)."""
+
+    path: str
+    update: Callable[[str], str]
+    # Quote the new value if it would not be read back as a string.
+    string: bool = True
+
+    def __post_init__(self):
+        self.keys = self.path.split(".")
+
+
+@dataclasses.dataclass
+class TextRule:
+    """Replace matches of `pattern` in every line, like `sed s/.../.../g`.
+
+    With `count=1` only the first match in a line is replaced (like sed without /g).
+    """
+
+    pattern: re.Pattern
+    replacement: str
+    count: int = 0
+
+
+@dataclasses.dataclass
+class FileRules:
+    """Rules for the files matching `glob` relative to the repository root."""
+
+    glob: str
+    rules: list[YamlRule | TextRule]
+    # Fail if no file matches.
+    required: bool = False
+
+
+def set_to(value: str) -> Callable[[str], str]:
+    return lambda _: value
+
+
+def replace_matching(glob: str, value: str) -> Callable[[str], str]:
+    """Like yq `select(. == "<glob>") |= "<value>"`."""
+    return lambda v: value if fnmatch.fnmatchcase(v, glob) else v
+
+
+def substitute(pattern: str, replacement: str) -> Callable[[str], str]:
+    """Like yq `sub("<pattern>", "<replacement>")`."""
+    regex = re.compile(pattern)
+    return lambda v: regex.sub(replacement, v)
+
+
+def release_rules(release: str, release_tag: str) -> list[FileRules]:
+    """The edits for a release tag (e.g. 25.3.0) of the release (e.g. 25.3)."""
+    return [
+        FileRules(
+            "docs/antora.yml",
+            [
+                # antora version should be major.minor, not patch level
+                YamlRule("version", set_to(release)),
+                YamlRule("prerelease", set_to("false"), string=False),
+            ],
+        ),
+        FileRules(
+            # Not all operators have a getting started guide.
+            "docs/templating_vars.yaml",
+            [
+                # for an initial tag for a given release...
+                YamlRule("versions.*", replace_matching("*dev", release_tag)),
+                # ...and for patch releases/release candidates, assuming that the tag (e.g. 23.7.1)
+                # is applied to an earlier tag in the same release (e.g. 23.7.0).
+                # Note: this also matches versions of external components that happen to start
+                # with the release (e.g. a product version 23.7.4).
+                YamlRule("versions.*", replace_matching(f"{release}*", release_tag)),
+                YamlRule(
+                    "helm.repo_name", substitute("stackable-dev", "stackable-stable")
+                ),
+                YamlRule("helm.repo_url", substitute("helm-dev", "helm-stable")),
+            ],
+        ),
+        FileRules(
+            # Replace "nightly" link so the documentation refers to the current version
+            "docs/**/*.adoc",
+            [TextRule(re.compile("nightly@home"), "home")],
+        ),
+        FileRules(
+            # Operator version for the integration tests (used when installing the operators),
+            # also for patch releases/release candidates, i.e. replace 24.11.0-rc1 with 24.11.0,
+            # 24.7.0 with 24.7.1 etc.
+            "tests/release.yaml",
+            [
+                YamlRule(
+                    "releases.tests.products.*.operatorVersion",
+                    substitute("0.0.0-dev", release_tag),
+                ),
+                YamlRule(
+                    "releases.tests.products.*.operatorVersion",
+                    replace_matching(f"{release}*", release_tag),
+                ),
+            ],
+            required=True,
+        ),
+        FileRules(
+            # Some tests perform **label** inspection and for (only) these cases specific labels should be updated.
+            # N.B. don't do this for all test files as not all images will necessarily exist for the given release tag.
+            "tests/templates/kuttl/**/*",
+            [
+                TextRule(
+                    re.compile(r'(app\.kubernetes\.io/version: ".*-stackable)[^"]*'),
+                    rf"\g<1>{release_tag}",
+                    count=1,
+                )
+            ],
+        ),
+    ]
+
+
+def rewrite(content: str, rules: list[YamlRule | TextRule]) -> str:
+    """Apply all rules to the content in one pass over its lines."""
+    yaml_rules = [r for r in rules if isinstance(r, YamlRule)]
+    text_rules = [r for r in rules if isinstance(r, TextRule)]
+    # (indent, key) of the mappings enclosing the current line
+    parents: list[tuple[int, str]] = []
+    lines = content.splitlines(keepends=True)
+    for i, line in enumerate(lines):
+        for rule in text_rules:
+            line = rule.pattern.sub(rule.replacement, line, count=rule.count)
+
+        if yaml_rules and (match := YAML_KEY_VALUE.match(line.rstrip("\r\n"))):
+            indent = len(match["indent"])
+            while parents and parents[-1][0] >= indent:
+                parents.pop()
+            path = [key for _, key in parents] + [match["key"]]
+            if match["value"]:
+                line = update_scalar(line, match, path, yaml_rules)
+            else:
+                parents.append((indent, match["key"]))
+        lines[i] = line
+    return "".join(lines)
+
+
+def update_scalar(
+    line: str, match: re.Match, path: list[str], rules: list[YamlRule]
+) -> str:
+    raw = match["value"]
+    quote = raw[0] if raw[0] in "\"'" else ""
+    value = raw[1:-1] if quote else raw
+    string = True
+    for rule in rules:
+        if len(rule.keys) == len(path) and all(
+            fnmatch.fnmatchcase(key, pattern) for key, pattern in zip(path, rule.keys)
+        ):
+            value = rule.update(value)
+            string = rule.string
+    if value == (raw[1:-1] if quote else raw):
+        return line
+    if string and not quote and not isinstance(yaml.safe_load(value), str):
+        quote = '"'
+    if not string:
+        quote = ""
+    newline = line[len(line.rstrip("\r\n")) :]
+    return (
+        f"{match['indent']}{match['key']}:{match['sep']}"
+        f"{quote}{value}{quote}{match['rest']}{newline}"
+    )
+
+
+def files_to_update(
+    repo_dir: pathlib.Path, file_rules: list[FileRules]
+) -> dict[pathlib.Path, list[YamlRule | TextRule]]:
+    """Return the rules of every file, so that files matching several globs are only rewritten once."""
+    files = {}
+    for entry in file_rules:
+        matches = [p for p in sorted(repo_dir.glob(entry.glob)) if p.is_file()]
+        if entry.required and not matches:
+            raise FileNotFoundError(f"{repo_dir / entry.glob} not found")
+        for path in matches:
+            files.setdefault(path, []).extend(entry.rules)
+    return files
+
+
+def update_repo(
+    repo_dir: pathlib.Path, release: str, release_tag: str, dry_run: bool
+) -> tuple[list[str], str]:
+    """Update one repository. Returns the changed files and the diff (dry run only)."""
+    changed = []
+    diff = []
+    for path, rules in files_to_update(
+        repo_dir, release_rules(release, release_tag)
+    ).items():
+        try:
+            content = path.read_bytes().decode("utf-8")
+        except UnicodeDecodeError:
+            # e.g. binary test fixtures below tests/templates/kuttl
+            continue
+        updated = rewrite(content, rules)
+        if updated == content:
+            continue
+        rel_path = path.relative_to(repo_dir)
+        changed.append(str(rel_path))
+        if dry_run:
+            diff.extend(
+                difflib.unified_diff(
+                    content.splitlines(keepends=True),
+                    updated.splitlines(keepends=True),
+                    f"a/{repo_dir.name}/{rel_path}",
+                    f"b/{repo_dir.name}/{rel_path}",
+                )
+            )
+        else:
+            path.write_bytes(updated.encode("utf-8"))
+    return changed, "".join(diff)
+
+
+def cli_release_tag(cli_arg: str) -> str:
+    if not TAG_REGEX.match(cli_arg):
+        raise argparse.ArgumentTypeError(
+            f"Provided tag [{cli_arg}] does not match the required tag regex pattern [{TAG_REGEX.pattern}]"
+        )
+    return cli_arg
+
+
+def cli_positive_int(cli_arg: str) -> int:
+    try:
+        value = int(cli_arg)
+    except ValueError:
+        value = 0
+    if value < 1:
+        raise argparse.ArgumentTypeError("Expected a positive integer")
+    return value
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Update the versions in the docs and tests of operator repositories for a release.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument(
+        "repo_dirs",
+        help="Operator repository checkouts.",
+        nargs="+",
+        type=pathlib.Path,
+    )
+    parser.add_argument(
+        "-t",
+        "--release-tag",
+        help="Release tag, e.g. 25.3.0 or 25.3.0-rc1",
+        type=cli_release_tag,
+        required=True,
+    )
+    parser.add_argument(
+        "--dry-run",
+        help="Print a diff of the changes instead of writing them.",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        help="Number of repositories updated in parallel. Default: number of CPUs.",
+        type=cli_positive_int,
+        default=os.cpu_count() or 1,
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv) -> int:
+    args = parse_args(argv[1:])
+    # for a tag of e.g. 23.1.1, the release is 23.1
+    release = ".".join(args.release_tag.split(".")[:2])
+
+    start = time.monotonic()
+    failed = 0
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=min(args.jobs, len(args.repo_dirs))
+    ) as pool:
+        futures = [
+            pool.submit(update_repo, repo_dir, release, args.release_tag, args.dry_run)
+            for repo_dir in args.repo_dirs
+        ]
+        for repo_dir, future in zip(args.repo_dirs, futures):
+            try:
+                changed, diff = future.result()
+            except (OSError, UnicodeError, yaml.YAMLError) as e:
+                print(f"{repo_dir}: {e}", file=sys.stderr)
+                failed += 1
+                continue
+            sys.stdout.write(diff)
+            print(
+                f"{repo_dir}: {len(changed)} file(s) {'to change' if args.dry_run else 'changed'}",
+                file=sys.stderr,
+            )
+    print(
+        f"Updated {len(args.repo_dirs) - failed} repositories in {time.monotonic() - start:.1f}s",
+        file=sys.stderr,
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+List all non-archived, non-fork repositories of the stackabletech GitHub organization.
+
+The first page of /orgs/<org>/repos is requested and its `Link` header tells
+the number of the last page, the remaining pages are then fetched in parallel.
+The responses are cached together with their ETags in
+~/.cache/stackable-utils/github. Later runs send `If-None-Match`, so GitHub
+answers unchanged pages with 304 Not Modified, which does not count against the
+rate limit.
+
+The output is the `repositories` list of the Renovate configuration:
+
+    repositories: [
+        "airflow-operator",
+        ...
+    ]
+
+Usage:
+
+    USERNAME=<user> TOKEN=<token> ./renovate/list_repos.py
+
+    # Against a local stand-in of the GitHub API
+    ./renovate/list_repos.py --api-url http://localhost:8000 --no-cache
+
+The credentials are taken from USERNAME and TOKEN (basic auth, as with curl -u).
+Without USERNAME, TOKEN or GITHUB_TOKEN is sent as a bearer token.
+"""
+
+import argparse
+import base64
+import concurrent.futures
+import dataclasses
+import hashlib
+import json
+import os
+import pathlib
+import re
+import sys
+import urllib.error
+import urllib.parse
+import urllib.request
+
+API_URL = "https://api.github.com"
+ORG = "stackabletech"
+PER_PAGE = 100
+MAX_WORKERS = 8
+TIMEOUT = 30
+CACHE_DIR = (
+    pathlib.Path(os.environ.get("XDG_CACHE_HOME", pathlib.Path.home() / ".cache"))
+    / "stackable-utils"
+    / "github"
+)
+
+# <https://api.github.com/organizations/1/repos?per_page=100&page=4>; rel="last"
+LINK_LAST = re.compile(r'<([^>]*)>;\s*rel="last"')
+
+
+class ListReposException(Exception):
+    pass
+
+
+@dataclasses.dataclass
+class Page:
+    repos: list[dict]
+    # Number of the last page from the Link header (1 if there is no Link header)
+    last: int
+    # Served from the cache after a 304 response
+    cached: bool = False
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="List all non-archived, non-fork repositories of a GitHub organization for Renovate.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument(
+        "--org", help=f"GitHub organization. Default: {ORG}", default=ORG
+    )
+    parser.add_argument(
+        "--api-url",
+        help=f"URL of the GitHub API. Default: {API_URL}",
+        default=API_URL,
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help=f"Directory of the cached responses. Default: {CACHE_DIR}",
+        type=pathlib.Path,
+        default=CACHE_DIR,
+    )
+    parser.add_argument(
+        "--no-cache",
+        help="Neither use nor store cached responses.",
+        dest="cache_dir",
+        action="store_const",
+        const=None,
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        help=f"Number of pages fetched in parallel. Default: {MAX_WORKERS}",
+        type=int,
+        default=MAX_WORKERS,
+    )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        help="Report the requests and whether they were served from the cache on stderr.",
+        action="store_true",
+    )
+    return parser.parse_args(argv)
+
+
+def auth_headers() -> dict[str, str]:
+    username = os.environ.get("USERNAME")
+    token = os.environ.get("TOKEN") or os.environ.get("GITHUB_TOKEN")
+    if not token:
+        return {}
+    if username:
+        credentials = base64.b64encode(f"{username}:{token}".encode()).decode()
+        return {"Authorization": f"Basic {credentials}"}
+    return {"Authorization": f"Bearer {token}"}
+
+
+def page_url(args: argparse.Namespace, page: int) -> str:
+    query = urllib.parse.urlencode({"per_page": PER_PAGE, "page": page})
+    return f"{args.api_url.rstrip('/')}/orgs/{args.org}/repos?{query}"
+
+
+def cache_file(args: argparse.Namespace, url: str) -> pathlib.Path:
+    # The response depends on the user (e.g. private repositories), but not on the token.
+    key = f"{os.environ.get('USERNAME', '')}:{url}"
+    return args.cache_dir / f"{hashlib.sha256(key.encode()).hexdigest()}.json"
+
+
+def load_cached(path: pathlib.Path) -> dict | None:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def store_cached(path: pathlib.Path, entry: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(entry))
+    tmp.replace(path)
+
+
+def last_page(link: str | None) -> int:
+    """Return the page number of the rel="last" link, or 1 if there is none."""
+    match = LINK_LAST.search(link or "")
+    if not match:
+        return 1
+    query = urllib.parse.parse_qs(urllib.parse.urlsplit(match.group(1)).query)
+    return int(query.get("page", ["1"])[0])
+
+
+def fetch_page(args: argparse.Namespace, page: int) -> Page:
+    """Fetch one page of repositories, conditionally if it is cached."""
+    url = page_url(args, page)
+    headers = {
+        "Accept": "application/vnd.github+json",
+        "X-GitHub-Api-Version": "2022-11-28",
+        "User-Agent": "stackable-utils",
+        **auth_headers(),
+    }
+    cached_path = cache_file(args, url) if args.cache_dir else None
+    cached = load_cached(cached_path) if cached_path else None
+    if cached and cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+
+    request = urllib.request.Request(url, headers=headers)
+    try:
+        with urllib.request.urlopen(request, timeout=TIMEOUT) as response:
+            repos = json.load(response)
+            etag = response.headers.get("ETag")
+            link = response.headers.get("Link")
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and cached:
+            if args.verbose:
+                print(f"{url}: not modified", file=sys.stderr)
+            link = e.headers.get("Link") or cached.get("link")
+            return Page(cached["repos"], last_page(link), cached=True)
+        raise ListReposException(f"GET {url} failed: HTTP {e.code} {e.reason}")
+    except (OSError, ValueError) as e:
+        raise ListReposException(f"GET {url} failed: {e}")
+
+    if not isinstance(repos, list):
+        raise ListReposException(f"GET {url} did not return a list of repositories")
+    if args.verbose:
+        print(f"{url}: {len(repos)} repositories", file=sys.stderr)
+    if cached_path and etag:
+        store_cached(cached_path, {"etag": etag, "link": link, "repos": repos})
+    return Page(repos, last_page(link))
+
+
+def list_repos(args: argparse.Namespace) -> list[str]:
+    """Return the names of all non-archived, non-fork repositories in the order of the API."""
+    first = fetch_page(args, 1)
+    pages = [first]
+    if first.last > 1:
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, min(args.jobs, first.last - 1))
+        ) as pool:
+            pages.extend(
+                pool.map(lambda page: fetch_page(args, page), range(2, first.last + 1))
+            )
+    # The Link header of a cached first page is outdated if pages were added since.
+    while first.cached and len(pages[-1].repos) == PER_PAGE:
+        pages.append(fetch_page(args, len(pages) + 1))
+    return [
+        repo["name"]
+        for page in pages
+        for repo in page.repos
+        if not repo.get("archived") and not repo.get("fork")
+    ]
+
+
+def main(argv) -> int:
+    args = parse_args(argv[1:])
+    try:
+        repos = list_repos(args)
+    except ListReposException as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    if not repos:
+        print("No repositories found.")
+        return 1
+
+    print("repositories: [")
+    for repo in repos:
+        print(f'    "{repo}",')
+    print("]")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))